@@ -0,0 +1,268 @@
+# Standard library imports
+import hashlib                    # Content hashes of uploaded clips.
+import json                       # Cached results are stored as JSON.
+import os                         # Disk tier files and environment-based configuration.
+import tempfile                   # Atomic writes into the disk tier.
+import threading                  # The cache is shared by the API's request threads.
+from collections import OrderedDict  # LRU ordering of the memory tier.
+from typing import Dict, Optional    # For type annotations.
+
+# Hit/miss counters and tier size gauges.
+from metrics import INFERENCE_CACHE_REQUESTS, INFERENCE_CACHE_ENTRIES, INFERENCE_CACHE_BYTES
+
+# -------------------------------
+# Configuration
+# -------------------------------
+
+# Memory tier limits (per process).
+CACHE_ENTRIES = int(os.environ.get("GESTUREAI_CACHE_ENTRIES", "4096"))
+CACHE_MB = float(os.environ.get("GESTUREAI_CACHE_MB", "32"))
+# Optional disk tier, shared by all serving workers on the host; unset disables it.
+CACHE_DIR = os.environ.get("GESTUREAI_CACHE_DIR")
+CACHE_DISK_MB = float(os.environ.get("GESTUREAI_CACHE_DISK_MB", "1024"))
+# File holding a counter that `clear` bumps so every worker drops its memory tier (serve.py
+# sets one); defaults to a file in the disk tier, otherwise clearing is per process.
+GENERATION_FILE = os.environ.get("GESTUREAI_CACHE_GENERATION_FILE") or (
+    os.path.join(CACHE_DIR, "generation") if CACHE_DIR else None)
+
+# -------------------------------
+# Cache
+# -------------------------------
+
+class InferenceCache:
+    """
+    Content-addressed cache of model predictions.
+
+    The key is a SHA-256 over the model identity (id, version, checkpoint path, size and
+    mtime), the inference settings that change the output, and the raw clip bytes, so a
+    new model version, a retrained checkpoint or a changed setting never serves stale
+    results and identical uploads (retries, demo phrases) skip decoding and the model.
+
+    Lookups go memory (LRU bounded by entries and bytes) -> disk (one JSON file per key,
+    oldest-first eviction by size) -> miss; disk hits are promoted to memory.
+
+    Each process has its own memory tier. With a `generation_file` shared by the serving
+    workers, `clear` in any of them bumps the counter in that file and the others drop
+    their memory tier on their next lookup.
+    """
+    def __init__(self, max_entries: int = CACHE_ENTRIES, max_bytes: int = int(CACHE_MB * 2**20),
+                 disk_dir: Optional[str] = CACHE_DIR, disk_max_bytes: int = int(CACHE_DISK_MB * 2**20),
+                 generation_file: Optional[str] = GENERATION_FILE):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.generation_file = generation_file
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"memory": 0, "disk": 0, "miss": 0}
+        self._disk_bytes = 0
+        self._disk_entries = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_rescan()
+        self._generation = self._read_generation()
+
+    @staticmethod
+    def key(data: bytes, model_identity: str, **settings) -> str:
+        digest = hashlib.sha256()
+        digest.update(model_identity.encode())
+        digest.update(json.dumps(settings, sort_keys=True).encode())
+        digest.update(b"\0")
+        digest.update(data)
+        return digest.hexdigest()
+
+    # Record a lookup outcome.
+    def _count(self, result: str):
+        with self._lock:
+            self._stats[result] += 1
+        INFERENCE_CACHE_REQUESTS.labels(result=result).inc()
+
+    def get(self, key: str) -> Optional[Dict]:
+        self._check_generation()
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+        if payload is not None:
+            self._count("memory")
+            return json.loads(payload)
+        payload = self._disk_get(key)
+        if payload is not None:
+            self._count("disk")
+            self._memory_put(key, payload)
+            return json.loads(payload)
+        self._count("miss")
+        return None
+
+    def put(self, key: str, result: Dict):
+        payload = json.dumps(result).encode()
+        self._memory_put(key, payload)
+        self._disk_put(key, payload)
+
+    # -- memory tier --
+
+    def _memory_put(self, key: str, payload: bytes):
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old)
+            self._memory[key] = payload
+            self._memory_bytes += len(payload)
+            while len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+            self._memory_gauges()
+
+    def _memory_gauges(self):
+        INFERENCE_CACHE_ENTRIES.labels(tier="memory").set(len(self._memory))
+        INFERENCE_CACHE_BYTES.labels(tier="memory").set(self._memory_bytes)
+
+    def _drop_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._memory_gauges()
+
+    # -- cross-worker clearing --
+
+    def _read_generation(self) -> int:
+        if not self.generation_file:
+            return 0
+        try:
+            with open(self.generation_file) as f:
+                return int(f.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _check_generation(self):
+        # One small read per lookup; another worker's `clear` shows up as a new counter value.
+        generation = self._read_generation()
+        if generation != self._generation:
+            self._generation = generation
+            self._drop_memory()
+            if self.disk_dir:
+                self._disk_rescan()
+
+    def _bump_generation(self):
+        if not self.generation_file:
+            return
+        self._generation = self._read_generation() + 1
+        directory = os.path.dirname(os.path.abspath(self.generation_file))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(str(self._generation))
+        os.replace(tmp, self.generation_file)
+
+    # -- disk tier --
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + ".json")
+
+    def _disk_files(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:  # removed by another worker
+                        continue
+                    yield path, st.st_size, st.st_mtime
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                payload = f.read()
+            os.utime(path)  # mtime doubles as last-access time for eviction
+            return payload
+        except FileNotFoundError:
+            return None
+
+    def _disk_put(self, key: str, payload: bytes):
+        if not self.disk_dir or len(payload) > self.disk_max_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so concurrent workers never read a partial entry.
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        try:
+            replaced = os.path.getsize(path)  # Overwriting an existing entry (e.g. written by another worker).
+        except FileNotFoundError:
+            replaced = None
+        os.replace(tmp, path)
+        with self._lock:
+            self._disk_bytes += len(payload) - (replaced or 0)
+            self._disk_entries += replaced is None
+            over = self._disk_bytes > self.disk_max_bytes
+        if over:
+            self._disk_evict()
+        else:
+            self._disk_gauges()
+
+    def _disk_gauges(self):
+        INFERENCE_CACHE_BYTES.labels(tier="disk").set(self._disk_bytes)
+        INFERENCE_CACHE_ENTRIES.labels(tier="disk").set(self._disk_entries)
+
+    def _disk_rescan(self):
+        files = list(self._disk_files())
+        with self._lock:
+            self._disk_bytes = sum(size for _, size, _ in files)
+            self._disk_entries = len(files)
+        self._disk_gauges()
+
+    def _disk_evict(self):
+        # Rescan, since other workers share the directory; drop least recently used down to 90% of the limit.
+        files = sorted(self._disk_files(), key=lambda f: f[2])
+        total, entries = sum(size for _, size, _ in files), len(files)
+        for path, size, _ in files:
+            if total <= self.disk_max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                entries -= 1
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._disk_bytes, self._disk_entries = total, entries
+        self._disk_gauges()
+
+    def clear(self):
+        """Drop the disk tier and this process's memory tier; other workers follow via the generation file."""
+        self._bump_generation()
+        self._drop_memory()
+        if self.disk_dir:
+            for path, _, _ in list(self._disk_files()):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._disk_rescan()
+
+    def stats(self) -> Dict:
+        self._check_generation()
+        with self._lock:
+            lookups = sum(self._stats.values())
+            hits = self._stats["memory"] + self._stats["disk"]
+            return {
+                "lookups": lookups,
+                "hits": dict(memory=self._stats["memory"], disk=self._stats["disk"]),
+                "misses": self._stats["miss"],
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory": {"entries": len(self._memory), "mb": round(self._memory_bytes / 2**20, 3),
+                           "max_entries": self.max_entries, "max_mb": round(self.max_bytes / 2**20, 3)},
+                "disk": {"dir": self.disk_dir, "mb": round(self._disk_bytes / 2**20, 3),
+                         "max_mb": round(self.disk_max_bytes / 2**20, 3)} if self.disk_dir else None,
+            }
+
+# Shared cache used by the API.
+inference_cache = InferenceCache()
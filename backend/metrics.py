@@ -0,0 +1,202 @@
+# Standard library imports
+import contextvars                # Per-request timing accumulators that follow the request into threadpools.
+import os                         # PROMETHEUS_MULTIPROC_DIR switches to multi-process exposition.
+import time                       # High-resolution timers.
+from contextlib import contextmanager  # For the timing helpers below.
+
+# Prometheus client for metric types and the text exposition format.
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client import CollectorRegistry, multiprocess
+
+# SQLAlchemy pieces used to observe connection-pool waits and query execution.
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+# -------------------------------
+# Metric Definitions
+# -------------------------------
+
+# Latency buckets (seconds) covering fast metadata routes up to slow model inference.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "gestureai_http_request_duration_seconds", "HTTP request latency by route.",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+# Gauges are summed over live worker processes when serving with serve.py (multi-process mode).
+REQUESTS_IN_FLIGHT = Gauge(
+    "gestureai_http_requests_in_flight", "HTTP requests currently being served.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "gestureai_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection.",
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_LATENCY = Histogram(
+    "gestureai_db_query_duration_seconds", "Database statement execution time by statement type.",
+    ["statement"], buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Counter(
+    "gestureai_db_queries_total", "Database statements executed by statement type.", ["statement"],
+)
+BCRYPT_LATENCY = Histogram(
+    "gestureai_bcrypt_duration_seconds", "Password hashing/verification time.",
+    ["operation"], buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0),
+)
+INFERENCE_QUEUE_DEPTH = Gauge(
+    "gestureai_inference_queue_depth", "Inference requests waiting for or running on the model.",
+    multiprocess_mode="livesum",
+)
+INFERENCE_BATCH_SIZE = Histogram(
+    "gestureai_inference_batch_size", "Number of inputs per model invocation.",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+INFERENCE_FRAMES = Counter(
+    "gestureai_inference_frames_total", "Clip frames decoded vs. passed to the encoder after motion skipping.",
+    ["stage"],
+)
+INFERENCE_LATENCY = Histogram(
+    "gestureai_inference_duration_seconds", "Model invocation time.", buckets=LATENCY_BUCKETS,
+)
+# Hit rate = sum(rate(...{result=~"memory|disk"})) / sum(rate(...)).
+INFERENCE_CACHE_REQUESTS = Counter(
+    "gestureai_inference_cache_requests_total", "Inference cache lookups by outcome (memory, disk, miss).",
+    ["result"],
+)
+INFERENCE_CACHE_ENTRIES = Gauge(
+    "gestureai_inference_cache_entries", "Entries held by each inference cache tier.", ["tier"],
+    multiprocess_mode="max",
+)
+INFERENCE_CACHE_BYTES = Gauge(
+    "gestureai_inference_cache_bytes", "Bytes held by each inference cache tier.", ["tier"],
+    multiprocess_mode="max",
+)
+
+# -------------------------------
+# Per-request Timing (Server-Timing header)
+# -------------------------------
+
+# Maps a Server-Timing metric name to accumulated milliseconds for the current request.
+_request_timings: contextvars.ContextVar = contextvars.ContextVar("request_timings", default=None)
+
+def record_timing(name: str, seconds: float):
+    """Add `seconds` to the current request's Server-Timing entry `name` (no-op outside a request)."""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds * 1000.0
+
+@contextmanager
+def timed(histogram, timing_name: str, **labels):
+    """Observe the block's duration in `histogram` and in the request's Server-Timing header."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        (histogram.labels(**labels) if labels else histogram).observe(elapsed)
+        record_timing(timing_name, elapsed)
+
+@contextmanager
+def track_inference(batch_size: int = 1):
+    """Account one model invocation: queue depth while pending, batch size and duration."""
+    INFERENCE_QUEUE_DEPTH.inc()
+    INFERENCE_BATCH_SIZE.observe(batch_size)
+    try:
+        with timed(INFERENCE_LATENCY, "inference"):
+            yield
+    finally:
+        INFERENCE_QUEUE_DEPTH.dec()
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency and in-flight requests, and adding a
+    `Server-Timing` header (total, db, db-wait, bcrypt, inference) to every HTTP response.
+
+    Implemented at the ASGI level rather than with BaseHTTPMiddleware so streaming
+    responses (e.g. speech-to-text) are not buffered.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = {}
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                timings["total"] = (time.perf_counter() - start) * 1000.0
+                header = ", ".join(f"{name};dur={ms:.2f}" for name, ms in timings.items())
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"server-timing", header.encode())]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # Label by route template (e.g. /appusers/{user_id}) to keep cardinality bounded.
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status["code"]),
+            ).observe(time.perf_counter() - start)
+            _request_timings.reset(token)
+
+# -------------------------------
+# Database Instrumentation
+# -------------------------------
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a free connection."""
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            DB_POOL_WAIT.observe(elapsed)
+            record_timing("db-wait", elapsed)
+
+def instrument_engine(engine):
+    """Count and time every statement executed through `engine`."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_QUERIES.labels(statement=kind).inc()
+        DB_QUERY_LATENCY.labels(statement=kind).observe(elapsed)
+        record_timing("db", elapsed)
+
+# -------------------------------
+# Exposition
+# -------------------------------
+
+def render_metrics():
+    """
+    Return (body, content_type) in the Prometheus text exposition format.
+    Under serve.py every worker writes to PROMETHEUS_MULTIPROC_DIR, and any worker can
+    render the aggregate of all of them.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+def worker_exited(pid: int):
+    """Drop a dead serving worker's live gauges from the multi-process aggregate."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,209 @@
+# Standard library imports
+import os                         # For paths and environment-based configuration.
+import sys                        # To make the training code importable.
+import tempfile                   # Uploaded clips are decoded from a temporary file.
+import threading                  # Locks for the LRU and background activation threads.
+import time                       # Load / warm-up timing.
+from collections import OrderedDict  # LRU ordering of loaded models.
+from typing import Callable, Dict, Optional  # For type annotations.
+
+# The model definitions live in ../model (train.py); make them importable from the backend.
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model")
+if MODEL_DIR not in sys.path:
+    sys.path.insert(0, MODEL_DIR)
+
+# -------------------------------
+# Configuration
+# -------------------------------
+
+# Upper bound on the memory taken by loaded model weights (MB).
+MODEL_CACHE_MB = int(os.environ.get("GESTUREAI_MODEL_CACHE_MB", "2048"))
+# Number of dummy inferences run before a newly loaded model serves traffic.
+WARMUP_RUNS = int(os.environ.get("GESTUREAI_MODEL_WARMUP_RUNS", "3"))
+# Longest caption produced by greedy decoding.
+MAX_CAPTION_LEN = 50
+# Motion-aware frame skipping: minimum thumbnail difference for a frame to be encoded (negative disables).
+MOTION_THRESHOLD = float(os.environ.get("GESTUREAI_MOTION_THRESHOLD", "0.01"))
+# Frames decoded from an uploaded clip before skipping reduces them to at most MAX_FRAMES.
+DECODE_FRAMES = int(os.environ.get("GESTUREAI_DECODE_FRAMES", "96"))
+# Memory-map checkpoint weights so processes serving the same file share one copy in the page cache.
+MMAP_WEIGHTS = os.environ.get("GESTUREAI_MMAP_WEIGHTS", "0") == "1"
+
+# -------------------------------
+# Loaded Model
+# -------------------------------
+
+class LoadedModel:
+    """An ASLTranslator in eval mode together with its vocabulary and registry metadata."""
+    def __init__(self, modelid: int, version: str, artifact_path: str, mmap: bool = MMAP_WEIGHTS):
+        import torch
+        from evaluate import load_for_eval
+        from train import translator_from_state
+
+        self.modelid = modelid
+        self.version = version
+        self.artifact_path = artifact_path
+        start = time.perf_counter()
+        # Size + mtime of the loaded file: a checkpoint overwritten in place changes the identity.
+        st = os.stat(artifact_path)
+        self.artifact_stamp = f"{st.st_size}-{st.st_mtime_ns}"
+        state, vocab = load_for_eval(artifact_path, mmap=mmap)
+        if vocab is None:
+            raise ValueError(f"{artifact_path} has no vocabulary; register a best_model.pth / final_model.pth written by train.py")
+        self.vocab = vocab
+        # Full or adaptive-softmax output head, per the checkpoint; mmap-loaded tensors are used in place.
+        self.model = translator_from_state(state, assign=mmap)
+        self.model.eval()
+        self.size_bytes = sum(t.numel() * t.element_size() for t in self.model.state_dict().values())
+        self.load_seconds = time.perf_counter() - start
+        self.warm = False
+        self._torch = torch
+
+    def warmup(self, runs: int = WARMUP_RUNS):
+        """Run dummy clips through the model so the first real request does not pay one-off setup costs."""
+        dummy = self._torch.zeros(1, 8, 3, 224, 224)
+        for _ in range(runs):
+            self.predict_frames(dummy)
+        self.warm = True
+
+    def predict_frames(self, frames, motion_threshold: float = MOTION_THRESHOLD):
+        """
+        Greedy-decode a (1, T, 3, 224, 224) clip tensor into a sentence.
+        Near-duplicate frames are dropped first; returns (sentence, frames encoded).
+        """
+        from motion import select_frames
+        from train import MAX_FRAMES
+        if motion_threshold >= 0:
+            frames = frames[:, select_frames(frames[0], motion_threshold)]
+        else:
+            frames = frames[:, :MAX_FRAMES]
+        token_ids = self.model.generate_caption(frames, MAX_CAPTION_LEN, self.vocab)
+        return self.vocab.decode(token_ids), frames.shape[1]
+
+    @property
+    def identity(self) -> str:
+        """Everything about the model and inference settings that determines its predictions."""
+        return (f"{self.modelid}:{self.version}:{self.artifact_path}:{self.artifact_stamp}:"
+                f"{MOTION_THRESHOLD}:{DECODE_FRAMES}:{MAX_CAPTION_LEN}")
+
+    def share_memory(self):
+        """Move the weights to shared memory so forked serving workers never copy them (see serve.py)."""
+        self.model.share_memory()
+        return self
+
+    def describe(self) -> Dict:
+        return {"modelid": self.modelid, "version": self.version, "artifact_path": self.artifact_path,
+                "size_mb": round(self.size_bytes / 2**20, 2), "load_seconds": round(self.load_seconds, 3),
+                "warm": self.warm}
+
+# -------------------------------
+# Clip Decoding
+# -------------------------------
+
+def decode_clip(data: bytes, max_frames: int = DECODE_FRAMES):
+    """
+    Decode uploaded video bytes into a (1, T, 3, 224, 224) float tensor like the training pipeline.
+    Raises ValueError when no frame can be decoded.
+    """
+    from train import read_video_frames, frames_to_tensor
+    with tempfile.NamedTemporaryFile(suffix=".mp4") as f:
+        f.write(data)
+        f.flush()
+        # Reuse the training decoder so inference preprocessing matches training exactly, but
+        # without its black-frame fallback: that would return (and cache) a bogus prediction.
+        frames = read_video_frames(f.name, 0, 1 << 30, max_frames, pad_empty=False)
+    if len(frames) == 0:
+        raise ValueError("No video frames could be decoded from the upload")
+    return frames_to_tensor(frames).unsqueeze(0)
+
+# -------------------------------
+# Registry
+# -------------------------------
+
+class ModelRegistry:
+    """
+    Keeps recently used models in memory (LRU, bounded by MODEL_CACHE_MB) and tracks
+    the active model.
+
+    Activation loads and warms the new model on a background thread and then swaps
+    the active pointer under a lock, so in-flight and new requests never see a cold
+    or half-loaded model. Requests may pin a specific registry row instead.
+    """
+    def __init__(self, max_bytes: int = MODEL_CACHE_MB * 2**20):
+        self.max_bytes = max_bytes
+        self._models: "OrderedDict[int, LoadedModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[int, threading.Lock] = {}
+        self.active: Optional[LoadedModel] = None
+        self.activation: Dict = {"state": "idle"}
+
+    # Total bytes of loaded weights.
+    def _used_bytes(self) -> int:
+        return sum(m.size_bytes for m in self._models.values())
+
+    # Drop least recently used models until within budget; the active model is never evicted.
+    def _evict(self):
+        for modelid in list(self._models):
+            if self._used_bytes() <= self.max_bytes:
+                return
+            if self.active is not None and modelid == self.active.modelid:
+                continue
+            del self._models[modelid]
+
+    def get(self, modelid: int, version: str, artifact_path: str) -> LoadedModel:
+        """Return the loaded model for a registry row, loading (and warming) it on a miss."""
+        with self._lock:
+            if modelid in self._models:
+                self._models.move_to_end(modelid)
+                return self._models[modelid]
+            load_lock = self._load_locks.setdefault(modelid, threading.Lock())
+        # Only one thread loads a given model; concurrent requests for it wait here.
+        with load_lock:
+            with self._lock:
+                if modelid in self._models:
+                    self._models.move_to_end(modelid)
+                    return self._models[modelid]
+            loaded = LoadedModel(modelid, version, artifact_path)
+            loaded.warmup()
+            with self._lock:
+                self._models[modelid] = loaded
+                self._evict()
+            return loaded
+
+    def activate(self, modelid: int, version: str, artifact_path: str, background: bool = True,
+                 on_success: Optional[Callable[[], None]] = None):
+        """
+        Load + warm a model and atomically make it the active one. `on_success` runs after
+        the swap (e.g. to persist the new active row); it is not called if loading fails.
+        """
+        def run():
+            self.activation = {"state": "warming", "modelid": modelid, "version": version,
+                               "started": time.time()}
+            try:
+                loaded = self.get(modelid, version, artifact_path)
+                with self._lock:
+                    self.active = loaded  # Single reference swap: requests see the old or the new model.
+                    self._evict()
+                if on_success is not None:
+                    on_success()
+                self.activation = {"state": "active", "modelid": modelid, "version": version}
+            except Exception as e:
+                self.activation = {"state": "failed", "modelid": modelid, "version": version, "error": str(e)}
+
+        if background:
+            threading.Thread(target=run, name=f"activate-model-{modelid}", daemon=True).start()
+        else:
+            run()
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                "active": self.active.describe() if self.active else None,
+                "activation": dict(self.activation),
+                "loaded": [m.describe() for m in self._models.values()],
+                "used_mb": round(self._used_bytes() / 2**20, 2),
+                "budget_mb": round(self.max_bytes / 2**20, 2),
+            }
+
+# Shared registry used by the API.
+model_registry = ModelRegistry()
@@ -0,0 +1,287 @@
+"""
+Pre-fork production server for the GestureAI API.
+
+The parent process initialises the database, loads and warms the active model once,
+moves its weights to shared memory and then forks N uvicorn workers that accept on a
+shared listening socket. Workers inherit the weights copy-on-write, so memory does not
+grow with the worker count, and each worker is limited to its share of the CPU cores.
+
+    python serve.py --workers 4
+    python serve.py --workers 4 --checkpoint ../model/saved_model/best_model.pth   # no database needed
+    python serve.py --workers 4 --no-preload    # every worker loads its own copy (for comparison)
+
+Signals: SIGTERM/SIGINT stop all workers gracefully; SIGHUP reloads the active model in the
+parent and replaces the workers one at a time. Prometheus metrics from all workers are
+aggregated (multi-process mode) and served by any worker on /metrics.
+
+Model activation: workers never swap models themselves (a re-forked worker would come back
+with the parent's model). POST /gestureaimodel/{id}/activate marks the row active and sends
+SIGHUP to this process. The new model is loaded (with --no-preload: test-loaded in a
+throwaway process) before any worker is replaced; if that fails, the current workers keep
+serving and the active row is pointed back at their model, or cleared if none was active.
+With --checkpoint the model is fixed and the endpoint answers 409.
+"""
+# Standard library imports
+import argparse                   # Command-line options.
+import gc                         # Freeze the parent's heap before forking.
+import os                         # fork / wait / environment.
+import shutil                     # Reset the Prometheus multi-process directory.
+import signal                     # Worker supervision and reload.
+import socket                     # The listening socket shared by all workers.
+import tempfile                   # Default Prometheus multi-process directory.
+import time                       # Supervision loop polling.
+
+# -------------------------------
+# Configuration
+# -------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the GestureAI API with N forked workers sharing one model")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="torch intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Serve this model file (train.py's best_model.pth, which includes the vocabulary) "
+                             "as the active model instead of the database's active row")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="Load the model in every worker instead of once in the parent")
+    parser.add_argument("--mmap", action="store_true",
+                        help="Memory-map checkpoint weights instead of copying them into shared memory")
+    parser.add_argument("--metrics-dir", default=os.path.join(tempfile.gettempdir(), "gestureai-prometheus"),
+                        help="Directory for Prometheus multi-process metric files (cleared on start)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    if args.threads_per_worker is None:
+        args.threads_per_worker = max(1, (os.cpu_count() or 1) // args.workers)
+    return args
+
+# -------------------------------
+# Model Loading
+# -------------------------------
+
+def active_row(args):
+    """The database's active GestureAIModel row (None with --checkpoint or when none is active)."""
+    import api
+
+    if args.checkpoint:
+        return None
+    session = api.SessionLocal()
+    try:
+        return session.query(api.GestureAIModel).filter(api.GestureAIModel.is_active.is_(True)).first()
+    finally:
+        session.close()
+        # Connections opened here must not be shared with forked workers.
+        api.engine.dispose()
+
+def load_active_model(args):
+    """Load (and warm) the model to serve into the registry; returns the LoadedModel or None."""
+    from model_registry import model_registry
+
+    if args.checkpoint:
+        model_registry.activate(0, "local", args.checkpoint, background=False)
+    else:
+        active = active_row(args)
+        if active is not None and active.artifact_path:
+            model_registry.activate(active.modelid, active.version, active.artifact_path, background=False)
+    if model_registry.activation.get("state") == "failed":
+        raise SystemExit(f"Failed to load model: {model_registry.activation['error']}")
+    loaded = model_registry.active
+    if loaded is not None and not args.mmap:
+        # mmap-loaded weights are already shared through the page cache.
+        loaded.share_memory()
+    return loaded
+
+def check_load(args):
+    """
+    Load the active model in a throwaway child process and report whether it worked.
+    Used with --no-preload, where the parent never holds a model but must not replace
+    healthy workers with ones that cannot load theirs.
+    """
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            load_active_model(args)
+            code = 0
+        except SystemExit as e:
+            print(f"[serve] {e}", flush=True)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    from metrics import worker_exited
+    worker_exited(pid)
+    return os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+
+def restore_active_row(modelid):
+    """Point the database's active row back at the model still being served (none if `modelid` is None)."""
+    import api
+
+    session = api.SessionLocal()
+    try:
+        if modelid is None:
+            session.query(api.GestureAIModel).update({api.GestureAIModel.is_active: False},
+                                                     synchronize_session=False)
+            session.commit()
+        else:
+            api.set_active_model_row(session, modelid)
+    finally:
+        session.close()
+    api.engine.dispose()
+
+# -------------------------------
+# Workers
+# -------------------------------
+
+def run_worker(sock, args):
+    """Body of a forked worker: cap torch threads and serve the app on the inherited socket."""
+    import torch
+    import uvicorn
+    import api
+
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(sig, signal.SIG_DFL)
+    torch.set_num_threads(args.threads_per_worker)
+    if args.no_preload:
+        load_active_model(args)
+    config = uvicorn.Config(api.app, log_level=args.log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+def spawn(sock, args):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(sock, args)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+def retire(pid, workers):
+    from metrics import worker_exited
+    workers.discard(pid)
+    worker_exited(pid)
+
+def reap(workers, block=False):
+    """Collect exited workers; returns the pids that exited."""
+    exited = []
+    while workers:
+        pid, _ = os.waitpid(-1, 0 if block else os.WNOHANG)
+        if pid == 0:
+            break
+        if pid in workers:
+            retire(pid, workers)
+            exited.append(pid)
+        if block:
+            break
+    return exited
+
+# -------------------------------
+# Supervisor
+# -------------------------------
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Must be set before prometheus_client is first imported (through api / metrics).
+    shutil.rmtree(args.metrics_dir, ignore_errors=True)
+    os.makedirs(args.metrics_dir)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = args.metrics_dir
+    os.environ["GESTUREAI_PRELOADED"] = "1"
+    if args.checkpoint:
+        os.environ["GESTUREAI_CHECKPOINT"] = args.checkpoint
+    # Lets DELETE /inference-cache in one worker clear the memory tier of all of them.
+    generation_file = os.path.join(tempfile.gettempdir(), f"gestureai-cache-generation-{os.getpid()}")
+    os.environ.setdefault("GESTUREAI_CACHE_GENERATION_FILE", generation_file)
+    if args.mmap:
+        os.environ["GESTUREAI_MMAP_WEIGHTS"] = "1"
+    # Each worker starts its own speech-to-text pool; split the cores between them like the
+    # torch threads, instead of workers x cores recognizer processes.
+    os.environ.setdefault("GESTUREAI_STT_WORKERS", str(max(1, (os.cpu_count() or 1) // args.workers)))
+
+    import torch
+    import api
+
+    torch.set_num_threads(args.threads_per_worker)
+    if not args.checkpoint:
+        api.initialize_database()
+        api.engine.dispose()
+    if args.no_preload:
+        loaded = None
+        if not check_load(args):
+            raise SystemExit("Failed to load the active model")
+    else:
+        loaded = load_active_model(args)
+    served = active_row(args)
+    print(f"[serve] {args.workers} workers x {args.threads_per_worker} threads, "
+          f"model: {loaded.describe() if loaded else 'per-worker' if args.no_preload else 'none active'}", flush=True)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    state = {"stopping": False, "reload": False, "served": served.modelid if served is not None else None}
+    signal.signal(signal.SIGTERM, lambda *_: state.update(stopping=True))
+    signal.signal(signal.SIGINT, lambda *_: state.update(stopping=True))
+    signal.signal(signal.SIGHUP, lambda *_: state.update(reload=True))
+
+    # Objects alive now are shared with every worker; keep the GC from touching (and copying) them.
+    gc.collect()
+    gc.freeze()
+    workers = {spawn(sock, args) for _ in range(args.workers)}
+
+    while not state["stopping"]:
+        time.sleep(0.5)
+        for pid in reap(workers):
+            if not state["stopping"]:
+                print(f"[serve] worker {pid} exited; restarting", flush=True)
+                workers.add(spawn(sock, args))
+        if state["reload"]:
+            state["reload"] = False
+            print("[serve] reloading active model", flush=True)
+            gc.unfreeze()
+            try:
+                # Validate before touching the workers: a model that does not load must not
+                # replace healthy workers with ones that crash on start.
+                if args.no_preload:
+                    if not check_load(args):
+                        raise SystemExit("the active model failed to load")
+                else:
+                    load_active_model(args)
+            except SystemExit as e:
+                print(f"[serve] reload failed, keeping current workers: {e}", flush=True)
+                if not args.checkpoint:
+                    # Otherwise the broken row would also stop the next serve.py start.
+                    restore_active_row(state["served"])
+                continue
+            finally:
+                gc.collect()
+                gc.freeze()
+            served = active_row(args)
+            state["served"] = served.modelid if served is not None else None
+            # Rolling replacement: start the new worker before stopping an old one.
+            for pid in list(workers):
+                workers.add(spawn(sock, args))
+                os.kill(pid, signal.SIGTERM)  # uvicorn finishes in-flight requests before exiting
+                os.waitpid(pid, 0)
+                retire(pid, workers)
+
+    for pid in workers:
+        os.kill(pid, signal.SIGTERM)
+    while workers:
+        reap(workers, block=True)
+    api.speech_service.shutdown()
+    if os.path.exists(generation_file):
+        os.remove(generation_file)
+
+if __name__ == "__main__":
+    main()
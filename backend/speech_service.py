@@ -0,0 +1,294 @@
+# Standard library imports
+import array                      # To view 16-bit PCM bytes as integer samples.
+import asyncio                    # To bridge process-pool futures into async endpoints.
+import io                         # To read uploaded WAV bytes as a file-like object.
+import json                       # To decode the offline recognizer's JSON results.
+import os                         # For environment-based configuration and CPU count.
+import wave                       # To parse WAV headers and PCM payloads.
+from concurrent.futures import ProcessPoolExecutor  # Runs recognition on all cores.
+from concurrent.futures.process import BrokenProcessPool  # A recognizer process died.
+from typing import List, Optional, Tuple  # For type annotations.
+
+# Optional WebRTC voice-activity detector; falls back to an energy threshold when absent.
+try:
+    import webrtcvad
+except ImportError:  # pragma: no cover - depends on the deployment environment
+    webrtcvad = None
+
+# -------------------------------
+# Configuration
+# -------------------------------
+
+# Path to the offline (Vosk/Kaldi) acoustic model directory.
+STT_MODEL_PATH = os.environ.get("GESTUREAI_STT_MODEL", "models/vosk-model-small-en-us-0.15")
+# Number of recognizer processes; defaults to one per core.
+STT_WORKERS = int(os.environ.get("GESTUREAI_STT_WORKERS", os.cpu_count() or 1))
+# Audio format expected for raw PCM uploads: 16 kHz, mono, 16-bit little endian.
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+# Sample rates webrtcvad can process; uploads at other rates are rejected.
+SUPPORTED_SAMPLE_RATES = (8000, 16000, 32000, 48000)
+# VAD frame length in milliseconds (webrtcvad accepts 10, 20 or 30).
+FRAME_MS = 30
+# Silence (ms) after speech that closes a segment.
+SILENCE_MS = 600
+# Upper bound on a single segment so one long utterance cannot starve the pool.
+MAX_SEGMENT_MS = 15000
+# Segments shorter than this are treated as clicks/noise and dropped.
+MIN_SEGMENT_MS = 200
+# RMS threshold used by the energy fallback VAD.
+ENERGY_THRESHOLD = 500
+# Aggressiveness passed to webrtcvad (0 = least, 3 = most aggressive).
+VAD_AGGRESSIVENESS = 2
+
+# -------------------------------
+# Voice-Activity Segmentation
+# -------------------------------
+
+# Root-mean-square amplitude of a 16-bit PCM frame (energy fallback VAD).
+def _rms(frame: bytes) -> float:
+    samples = array.array("h", frame)
+    if not samples:
+        return 0.0
+    return (sum(s * s for s in samples) / len(samples)) ** 0.5
+
+class VoiceActivitySegmenter:
+    """
+    Incrementally splits a 16-bit mono PCM stream into speech segments.
+
+    Chunks of any size are fed with `feed`; each completed segment is returned as
+    a tuple of (start_seconds, end_seconds, pcm_bytes). Call `flush` at end of stream
+    to emit any trailing speech.
+    """
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frame_ms: int = FRAME_MS,
+                 silence_ms: int = SILENCE_MS, max_segment_ms: int = MAX_SEGMENT_MS,
+                 min_segment_ms: int = MIN_SEGMENT_MS):
+        self.sample_rate = sample_rate
+        self.frame_bytes = int(sample_rate * frame_ms / 1000) * SAMPLE_WIDTH
+        self.frame_ms = frame_ms
+        self.silence_frames = max(1, silence_ms // frame_ms)
+        self.max_segment_frames = max(1, max_segment_ms // frame_ms)
+        self.min_segment_frames = max(1, min_segment_ms // frame_ms)
+        self.vad = webrtcvad.Vad(VAD_AGGRESSIVENESS) if webrtcvad is not None else None
+        self._buffer = b""          # Bytes not yet forming a whole frame.
+        self._frames: List[bytes] = []  # Frames of the segment being collected.
+        self._speech_frames = 0     # Voiced frames in the current segment.
+        self._trailing_silence = 0  # Consecutive unvoiced frames at the segment tail.
+        self._frame_index = 0       # Frames consumed so far (for timestamps).
+        self._segment_start = 0     # Frame index where the current segment started.
+
+    # Decide whether a single frame contains speech.
+    def _is_speech(self, frame: bytes) -> bool:
+        if self.vad is not None:
+            return self.vad.is_speech(frame, self.sample_rate)
+        return _rms(frame) >= ENERGY_THRESHOLD
+
+    # Close the current segment and return it if it holds enough speech.
+    def _emit(self) -> Optional[Tuple[float, float, bytes]]:
+        frames, speech = self._frames, self._speech_frames
+        start = self._segment_start
+        self._frames, self._speech_frames, self._trailing_silence = [], 0, 0
+        if speech < self.min_segment_frames:
+            return None
+        end = start + len(frames)
+        to_seconds = self.frame_ms / 1000.0
+        return start * to_seconds, end * to_seconds, b"".join(frames)
+
+    # Consume a chunk of PCM bytes and return any segments it completed.
+    def feed(self, chunk: bytes) -> List[Tuple[float, float, bytes]]:
+        segments = []
+        buffer = self._buffer + chunk
+        # Walk the buffer by offset and keep only the partial tail, so a large chunk
+        # (a whole uploaded file) is not re-copied once per frame.
+        offset = 0
+        while len(buffer) - offset >= self.frame_bytes:
+            frame = buffer[offset:offset + self.frame_bytes]
+            offset += self.frame_bytes
+            voiced = self._is_speech(frame)
+            if not self._frames:
+                # Wait for the first voiced frame before opening a segment.
+                if voiced:
+                    self._segment_start = self._frame_index
+                    self._frames.append(frame)
+                    self._speech_frames = 1
+            else:
+                self._frames.append(frame)
+                if voiced:
+                    self._speech_frames += 1
+                    self._trailing_silence = 0
+                else:
+                    self._trailing_silence += 1
+                if (self._trailing_silence >= self.silence_frames
+                        or len(self._frames) >= self.max_segment_frames):
+                    segment = self._emit()
+                    if segment is not None:
+                        segments.append(segment)
+            self._frame_index += 1
+        self._buffer = buffer[offset:]
+        return segments
+
+    # Emit whatever speech remains at the end of the stream.
+    def flush(self) -> List[Tuple[float, float, bytes]]:
+        if not self._frames:
+            return []
+        segment = self._emit()
+        return [segment] if segment is not None else []
+
+# -------------------------------
+# Offline Recognizer (worker process side)
+# -------------------------------
+
+# Per-process recognizer model, loaded once by the pool initializer.
+_worker_model = None
+
+def _init_worker(model_path: str):
+    """Load the offline acoustic model once in each worker process."""
+    global _worker_model
+    from vosk import Model, SetLogLevel  # Imported here so the API process never loads Kaldi.
+    SetLogLevel(-1)
+    _worker_model = Model(model_path)
+
+def _recognize_segment(pcm: bytes, sample_rate: int) -> str:
+    """Run the offline recognizer over a single speech segment and return its text."""
+    from vosk import KaldiRecognizer
+    recognizer = KaldiRecognizer(_worker_model, sample_rate)
+    recognizer.AcceptWaveform(pcm)
+    return json.loads(recognizer.FinalResult()).get("text", "")
+
+# -------------------------------
+# Audio Helpers
+# -------------------------------
+
+def read_wav_pcm(data: bytes) -> Tuple[bytes, int]:
+    """
+    Extract 16-bit mono PCM and its sample rate from WAV bytes.
+
+    Stereo input is down-mixed; other sample widths and sample rates outside
+    SUPPORTED_SAMPLE_RATES are rejected with ValueError.
+    """
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        if wav.getsampwidth() != SAMPLE_WIDTH:
+            raise ValueError("Only 16-bit PCM audio is supported")
+        if wav.getframerate() not in SUPPORTED_SAMPLE_RATES:
+            raise ValueError("Sample rate must be one of "
+                             + ", ".join(f"{r // 1000} kHz" for r in SUPPORTED_SAMPLE_RATES))
+        pcm = wav.readframes(wav.getnframes())
+        if wav.getnchannels() == 2:
+            samples = array.array("h", pcm)
+            pcm = array.array("h", ((l + r) // 2 for l, r in zip(samples[0::2], samples[1::2]))).tobytes()
+        elif wav.getnchannels() != 1:
+            raise ValueError("Only mono or stereo audio is supported")
+        return pcm, wav.getframerate()
+
+# -------------------------------
+# Service
+# -------------------------------
+
+class SpeechToTextService:
+    """
+    Offline, chunked speech-to-text.
+
+    Incoming audio is split into utterances by `VoiceActivitySegmenter` and each
+    utterance is recognized in a process pool, so throughput scales with cores and
+    no network access is required. Results are produced as segments finish.
+    """
+    def __init__(self, model_path: str = STT_MODEL_PATH, workers: int = STT_WORKERS):
+        self.model_path = model_path
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    # Lazily start the worker pool so importing the API does not spawn processes.
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.model_path,),
+            )
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # Drop a pool whose process died (OOM, bad model path) so the next request starts a fresh one.
+    def _discard(self, pool: ProcessPoolExecutor):
+        if self._pool is pool:
+            self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit_segment(self, pcm: bytes, sample_rate: int):
+        """Submit one segment; returns (future, pool), retrying once on a fresh pool if the current one is broken."""
+        pool = self.pool
+        try:
+            return pool.submit(_recognize_segment, pcm, sample_rate), pool
+        except BrokenProcessPool:
+            self._discard(pool)
+            pool = self.pool
+            return pool.submit(_recognize_segment, pcm, sample_rate), pool
+
+    # Submit a segment to the pool and record its metadata against the awaitable future.
+    def _submit(self, pending: dict, index: int, segment: Tuple[float, float, bytes], sample_rate: int):
+        start, end, pcm = segment
+        meta = {"segment": index, "start": round(start, 3), "end": round(end, 3)}
+        try:
+            future, pool = self._submit_segment(pcm, sample_rate)
+        except BrokenProcessPool:
+            future, pool = asyncio.get_running_loop().create_future(), None
+            future.set_exception(BrokenProcessPool("speech recognizer pool could not start"))
+        else:
+            future = asyncio.wrap_future(future)
+        pending[future] = (meta, pool)
+
+    # Result record for a finished segment; a dead recognizer becomes an error record, not an exception.
+    def _result(self, pending: dict, future) -> dict:
+        meta, pool = pending.pop(future)
+        try:
+            return dict(meta, text=future.result())
+        except BrokenProcessPool:
+            if pool is not None:
+                self._discard(pool)
+            return dict(meta, error="speech recognizer process failed; segment not transcribed")
+
+    async def transcribe_stream(self, chunks, sample_rate: int = SAMPLE_RATE):
+        """
+        Async generator: consume an async iterable of PCM chunks and yield a dict per
+        recognized segment ({"segment", "start", "end", "text"}) as soon as it finishes.
+        A segment whose recognizer process died yields "error" instead of "text".
+        Segmentation is pure Python, so it runs in a thread to keep the event loop free.
+        """
+        loop = asyncio.get_running_loop()
+        segmenter = VoiceActivitySegmenter(sample_rate=sample_rate)
+        pending = {}
+        index = 0
+        async for chunk in chunks:
+            for segment in await loop.run_in_executor(None, segmenter.feed, chunk):
+                self._submit(pending, index, segment, sample_rate)
+                index += 1
+            # Hand back any segments that completed while we were reading.
+            for future in [f for f in pending if f.done()]:
+                yield self._result(pending, future)
+        for segment in await loop.run_in_executor(None, segmenter.flush):
+            self._submit(pending, index, segment, sample_rate)
+            index += 1
+        while pending:
+            done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield self._result(pending, future)
+
+    def transcribe_pcm(self, pcm: bytes, sample_rate: int = SAMPLE_RATE) -> str:
+        """Blocking helper: recognize a complete PCM buffer and return the joined text."""
+        segmenter = VoiceActivitySegmenter(sample_rate=sample_rate)
+        segments = segmenter.feed(pcm) + segmenter.flush()
+        submitted = [self._submit_segment(s[2], sample_rate) for s in segments]
+        try:
+            return " ".join(t for t in (f.result() for f, _ in submitted) if t)
+        except BrokenProcessPool:
+            for _, pool in submitted:
+                self._discard(pool)
+            raise
+
+# Shared service instance used by the API.
+speech_service = SpeechToTextService()
@@ -1,5 +1,6 @@
+import sys  # To read the optional WAV path from the command line.
 import pyttsx3  # Import pyttsx3 for text-to-speech conversion.
-import speech_recognition as sr  # Import SpeechRecognition library to convert speech to text.
+from speech_service import SpeechToTextService, read_wav_pcm  # Offline, chunked speech-to-text.
 
 def text_to_speech(text):
     """
@@ -12,27 +13,24 @@ def text_to_speech(text):
     engine.say(text)         # Queue the text to be spoken.
     engine.runAndWait()      # Process the queued command and speak the text.
 
-def speech_to_text():
+def speech_to_text(audio_path):
     """
-    Captures audio from the microphone and converts it to text using Google's speech recognition API.
+    Converts a recorded WAV file to text using the offline speech-to-text service.
+    
+    Parameters:
+        audio_path (str): Path to a 16-bit PCM WAV recording.
     
     Returns:
         str: The recognized text or an error message if recognition fails.
     """
-    recognizer = sr.Recognizer()  # Create an instance of the Recognizer class.
-    with sr.Microphone() as source:  # Use the default system microphone as the audio source.
-        print("Speak now...")          # Prompt the user to speak.
-        audio = recognizer.listen(source)  # Listen for the first phrase and record the audio.
-    
+    with open(audio_path, "rb") as f:  # Read the recording from disk.
+        pcm, sample_rate = read_wav_pcm(f.read())
+    service = SpeechToTextService()  # Recognition runs locally; no network is needed.
     try:
-        # Use Google's speech recognition to convert audio to text.
-        return recognizer.recognize_google(audio)
-    except sr.UnknownValueError:
-        # Handle the case when speech is unintelligible.
-        return "Audio not recognized."
-    except sr.RequestError as e:
-        # Handle errors related to the API request (e.g., no internet connection).
-        return f"Request failed: {e}"
+        text = service.transcribe_pcm(pcm, sample_rate)
+    finally:
+        service.shutdown()  # Stop the worker processes.
+    return text or "Audio not recognized."
 
 if __name__ == '__main__':
     # Define sample text to be converted to speech.
@@ -40,6 +38,7 @@ if __name__ == '__main__':
     print("Converting text to speech...")
     text_to_speech(sample_text)  # Call the function to convert text to spoken output.
     
-    print("\nConverting your speech to text...")
-    result = speech_to_text()  # Capture speech from the microphone and convert it to text.
-    print("You said:", result)  # Print the recognized text or error message.
+    if len(sys.argv) > 1:
+        print("\nConverting your speech to text...")
+        result = speech_to_text(sys.argv[1])  # Transcribe the WAV file given on the command line.
+        print("You said:", result)  # Print the recognized text or error message.
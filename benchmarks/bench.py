@@ -0,0 +1,449 @@
+"""
+Offline benchmark suite for the GestureAI data pipeline, model and API hot paths.
+
+Everything runs on synthetic inputs: short random videos are written to a temp
+directory and the API talks to an in-memory SQLite database instead of PostgreSQL.
+
+Usage:
+    python benchmarks/bench.py run --output results.json
+    python benchmarks/bench.py run --only decode,dataloader --quick
+    python benchmarks/bench.py compare baseline.json results.json --threshold 0.10
+
+`compare` exits with status 1 when any metric regresses by more than the threshold,
+so it can gate CI between commits.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "model"))
+sys.path.insert(0, os.path.join(REPO_ROOT, "backend"))
+
+# -----------------------------
+# Timing helpers
+# -----------------------------
+def percentile(sorted_samples, q):
+    """Linear-interpolated percentile of an already sorted list."""
+    pos = (len(sorted_samples) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_samples) - 1)
+    return sorted_samples[lo] + (sorted_samples[hi] - sorted_samples[lo]) * (pos - lo)
+
+def percentiles(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        "p50": percentile(ordered, 50),
+        "p90": percentile(ordered, 90),
+        "p99": percentile(ordered, 99),
+        "mean": sum(ordered) / len(ordered),
+    }
+
+def time_call(fn, repeat, warmup=1):
+    """Run fn warmup+repeat times and return the per-call wall times in ms."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return times
+
+def metric(value, unit, higher_is_better):
+    return {"value": float(value), "unit": unit, "higher_is_better": higher_is_better}
+
+# -----------------------------
+# Synthetic data
+# -----------------------------
+WORDS = "hello how are you doing my name is arun the weather is good today thank you".split()
+
+def make_synthetic_dataset(root, num_videos, seconds, fps=24, size=(320, 240), seed=0):
+    """Write random mp4 clips and a How2Sign-style TSV; return the TSV path."""
+    import cv2
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(num_videos):
+        name = f"synthetic_{i:04d}"
+        writer = cv2.VideoWriter(os.path.join(root, f"{name}.mp4"),
+                                 cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+        for _ in range(int(seconds * fps)):
+            writer.write(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8))
+        writer.release()
+        sentence = " ".join(rng.choice(WORDS, size=rng.integers(4, 12)))
+        rows.append([f"vid{i}", name, f"s{i}", name, 0.0, float(seconds), sentence])
+    csv_path = os.path.join(root, "synthetic.csv")
+    with open(csv_path, "w") as f:
+        for row in rows:
+            f.write("\t".join(str(c) for c in row) + "\n")
+    return csv_path
+
+def load_synthetic(root, args):
+    import train
+    csv_path = make_synthetic_dataset(root, args.videos, args.seconds)
+    sentences = [line.rstrip("\n").split("\t")[-1] for line in open(csv_path)]
+    vocab = train.Vocabulary(freq_threshold=1)
+    vocab.build_vocabulary(sentences)
+    dataset = train.How2SignDataset(csv_path, root, vocab, max_frames=args.max_frames)
+    return dataset, vocab
+
+# -----------------------------
+# Benchmarks: data pipeline
+# -----------------------------
+def bench_decode(ctx, args):
+    import train
+    dataset = ctx["dataset"]
+    frames = 0
+
+    def run():
+        nonlocal frames
+        for row in dataset.samples:
+            start = int(float(row['START']) * train.FPS)
+            end = int(float(row['END']) * train.FPS)
+            frames += dataset._load_video_segment(
+                os.path.join(dataset.video_dir, f"{row['VIDEO_NAME']}.mp4"),
+                start, end, dataset.max_frames).shape[0]
+
+    run()  # warm the page cache so we time decode rather than first-touch I/O
+    frames = 0
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        run()
+    elapsed = time.perf_counter() - t0
+    return {"decode.fps": metric(frames / elapsed, "frames/s", True)}
+
+def bench_dataloader(ctx, args):
+    from torch.utils.data import DataLoader
+    import train
+    results = {}
+    for workers in args.workers:
+        loader = DataLoader(ctx["dataset"], batch_size=args.batch_size, shuffle=True,
+                            num_workers=workers, collate_fn=train.collate_fn)
+        samples = 0
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            for videos, _captions in loader:
+                samples += videos.shape[0]
+        elapsed = time.perf_counter() - t0
+        results[f"dataloader.workers{workers}.samples_per_s"] = metric(samples / elapsed, "samples/s", True)
+    return results
+
+def bench_shards(ctx, args):
+    """Same clips as `dataloader`, packed into tar shards and streamed with ShardedClipDataset."""
+    from torch.utils.data import DataLoader
+    import shards
+    import train
+    dataset = ctx["dataset"]
+    results = {}
+    with tempfile.TemporaryDirectory() as out:
+        t0 = time.perf_counter()
+        csv_path = os.path.join(dataset.video_dir, "synthetic.csv")
+        shards.pack(csv_path, dataset.video_dir, out, samples_per_shard=max(len(dataset) // 4, 1),
+                    num_workers=0, max_frames=args.max_frames)
+        results["shards.pack.clips_per_s"] = metric(len(dataset) / (time.perf_counter() - t0), "clips/s", True)
+        for workers in args.workers:
+            stream = shards.ShardedClipDataset(out, ctx["vocab"], buffer_size=8)
+            loader = DataLoader(stream, batch_size=args.batch_size, num_workers=workers, collate_fn=train.collate_fn)
+            samples = 0
+            t0 = time.perf_counter()
+            for epoch in range(args.repeat):
+                stream.set_epoch(epoch)
+                for videos, _captions in loader:
+                    samples += videos.shape[0]
+            elapsed = time.perf_counter() - t0
+            results[f"shards.workers{workers}.samples_per_s"] = metric(samples / elapsed, "samples/s", True)
+    return results
+
+def bench_collate(ctx, args):
+    import train
+    items = [ctx["dataset"][i % len(ctx["dataset"])] for i in range(args.batch_size)]
+    times = time_call(lambda: train.collate_fn(items), args.repeat * 5)
+    return {"collate_fn.ms": metric(percentiles(times)["p50"], "ms", False)}
+
+# -----------------------------
+# Benchmarks: model
+# -----------------------------
+def _synthetic_batch(args, vocab_size):
+    import torch
+    videos = torch.rand(args.batch_size, args.max_frames, 3, 224, 224)
+    captions = torch.randint(4, vocab_size, (args.batch_size, 16))
+    return videos, captions
+
+def bench_model(ctx, args):
+    import torch
+    import train
+    torch.manual_seed(0)
+    vocab_size = len(ctx["vocab"].word2idx)
+    model = train.ASLTranslator(vocab_size, train.EMBED_SIZE, train.HIDDEN_SIZE).to(train.DEVICE)
+    optimizer = torch.optim.Adam(model.parameters(), lr=train.LEARNING_RATE)
+    videos, captions = (t.to(train.DEVICE) for t in _synthetic_batch(args, vocab_size))
+
+    model.eval()
+    with torch.no_grad():
+        enc = time_call(lambda: model.encoder(videos), args.repeat)
+
+    model.train()
+    fwd, bwd = [], []
+    for step in range(args.repeat + 1):
+        optimizer.zero_grad()
+        t0 = time.perf_counter()
+        loss = model(videos, captions[:, :-1], targets=captions[:, 1:])
+        t1 = time.perf_counter()
+        loss.backward()
+        optimizer.step()
+        t2 = time.perf_counter()
+        if step > 0:  # first step is warmup
+            fwd.append((t1 - t0) * 1000.0)
+            bwd.append((t2 - t1) * 1000.0)
+
+    # Greedy decoding with EOS disabled so every run produces max_len tokens.
+    max_len = 30
+    vocab = ctx["vocab"]
+    one = videos[:1]
+    model.decoder.fc.bias.data[vocab.word2idx["<EOS>"]] = -1e9
+    tokens = 0
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        tokens += len(model.generate_caption(one, max_len, vocab))
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "VideoEncoder.forward.ms": metric(percentiles(enc)["p50"], "ms/batch", False),
+        "train.forward.ms": metric(percentiles(fwd)["p50"], "ms/batch", False),
+        "train.backward_step.ms": metric(percentiles(bwd)["p50"], "ms/batch", False),
+        "generate_caption.tokens_per_s": metric(tokens / elapsed, "tokens/s", True),
+    }
+
+def bench_decoder(ctx, args):
+    """
+    Output-layer variants on the decoder alone (encoder features are random):
+    full softmax over a word vocabulary, adaptive softmax over the same vocabulary,
+    and a full softmax over a subword-sized vocabulary.
+    """
+    import torch
+    import train
+    torch.manual_seed(0)
+    batch, seq_len = args.batch_size * 4, 24
+    variants = {
+        "word_full": (args.word_vocab, None),
+        "word_adaptive": (args.word_vocab, train.adaptive_cutoffs_for(args.word_vocab, [2000, 10000])),
+        "subword_full": (args.subword_vocab, None),
+    }
+    results = {}
+    for name, (vocab_size, cutoffs) in variants.items():
+        decoder = train.Decoder(vocab_size, train.EMBED_SIZE, train.HIDDEN_SIZE, cutoffs).to(train.DEVICE)
+        optimizer = torch.optim.Adam(decoder.parameters(), lr=train.LEARNING_RATE)
+        features = torch.randn(batch, train.HIDDEN_SIZE, device=train.DEVICE)
+        # Zipf-like targets: low (frequent) ids dominate, as with frequency-ordered vocabularies.
+        ranks = torch.arange(4, vocab_size, dtype=torch.float)
+        captions = torch.multinomial(1.0 / ranks, batch * seq_len, replacement=True).view(batch, seq_len) + 4
+        captions = captions.to(train.DEVICE)
+
+        def step():
+            optimizer.zero_grad()
+            decoder.loss(decoder.hidden(features, captions[:, :-1]), captions[:, 1:]).backward()
+            optimizer.step()
+        steps = time_call(step, args.repeat)
+
+        decoder.eval()
+        with torch.no_grad():
+            h = features[:1].unsqueeze(0)
+            c = torch.zeros_like(h)
+            token = torch.ones(1, 1, dtype=torch.long, device=train.DEVICE)
+            t0 = time.perf_counter()
+            tokens = args.repeat * 30
+            for _ in range(tokens):
+                out, (h, c) = decoder.lstm(decoder.embed(token), (h, c))
+                token = decoder.predict(out.squeeze(1)).unsqueeze(0)
+            elapsed = time.perf_counter() - t0
+        head = decoder.adaptive if cutoffs else decoder.fc
+        results[f"decoder.{name}.train_step.ms"] = metric(percentiles(steps)["p50"], "ms/batch", False)
+        results[f"decoder.{name}.generate.tokens_per_s"] = metric(tokens / elapsed, "tokens/s", True)
+        results[f"decoder.{name}.head_params_mb"] = metric(
+            sum(p.numel() * p.element_size() for p in head.parameters()) / 2**20, "MB", False)
+    return results
+
+# -----------------------------
+# Benchmarks: API
+# -----------------------------
+def _sqlite_session_factory():
+    """In-memory SQLite stand-in for the PostgreSQL database used by the API."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.dialects.postgresql import BYTEA
+    from sqlalchemy.ext.compiler import compiles
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    import api
+
+    @compiles(BYTEA, "sqlite")
+    def _bytea_as_blob(element, compiler, **kw):
+        return "BLOB"
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    api.Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def bench_api(ctx, args):
+    from fastapi.testclient import TestClient
+    import api
+
+    Session = _sqlite_session_factory()
+
+    def override_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    api.app.dependency_overrides[api.get_db_session] = override_db
+    client = TestClient(api.app)  # not used as a context manager: skips the PostgreSQL startup hook
+    for i in range(args.users):
+        client.post("/appusers", json={"username": f"user{i}", "email": f"user{i}@example.com",
+                                       "password": "benchmark-password"})
+
+    endpoints = {
+        "GET /": lambda: client.get("/"),
+        "GET /appusers": lambda: client.get("/appusers"),
+        "GET /appusers/{id}": lambda: client.get("/appusers/1"),
+        "POST /login": lambda: client.post("/login", json={"identifier": "user0",
+                                                           "password": "benchmark-password"}),
+        "POST /appusers/{id}/use-model": lambda: client.post("/appusers/1/use-model",
+                                                             params={"input_data": "hello"}),
+    }
+    results = {}
+    try:
+        for name, call in endpoints.items():
+            assert call().status_code < 500, name
+            stats = percentiles(time_call(call, args.requests))
+            for key in ("p50", "p90", "p99"):
+                results[f"api.{name}.{key}_ms"] = metric(stats[key], "ms", False)
+    finally:
+        api.app.dependency_overrides.clear()
+    return results
+
+def bench_cache(ctx, args):
+    """Inference cache hit path (hash clip bytes + memory / disk lookup) for a 1 MB upload."""
+    from inference_cache import InferenceCache
+    clip = os.urandom(2**20)
+    result = {"prediction": "hello how are you", "modelid": 1, "version": "v1",
+              "frames_decoded": 96, "frames_encoded": 32}
+    results = {}
+    with tempfile.TemporaryDirectory() as disk_dir:
+        for tier, cache in (("memory", InferenceCache(disk_dir=None)),
+                            ("disk", InferenceCache(max_entries=0, disk_dir=disk_dir))):
+            cache.put(cache.key(clip, "1:v1"), result)
+            times = time_call(lambda: cache.get(cache.key(clip, "1:v1")), args.repeat * 20)
+            results[f"inference_cache.{tier}_hit.us"] = metric(percentiles(times)["p50"] * 1000.0, "us", False)
+    return results
+
+BENCHMARKS = {
+    "decode": bench_decode,
+    "collate": bench_collate,
+    "dataloader": bench_dataloader,
+    "shards": bench_shards,
+    "model": bench_model,
+    "decoder": bench_decoder,
+    "api": bench_api,
+    "cache": bench_cache,
+}
+
+# -----------------------------
+# Run / compare
+# -----------------------------
+def environment():
+    info = {"python": platform.python_version(), "machine": platform.machine(),
+            "cpus": os.cpu_count(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    try:
+        info["commit"] = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        info["commit"] = None
+    try:
+        import torch
+        info["torch"] = torch.__version__
+        info["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return info
+
+def run(args):
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    if args.quick:
+        args.videos, args.seconds, args.repeat, args.requests = 4, 1.0, 2, 20
+    metrics = {}
+    with tempfile.TemporaryDirectory() as root:
+        ctx = {}
+        if any(name in selected for name in ("decode", "collate", "dataloader", "shards", "model")):
+            ctx["dataset"], ctx["vocab"] = load_synthetic(root, args)
+        for name in selected:
+            print(f"[bench] {name} ...", flush=True)
+            for key, value in BENCHMARKS[name](ctx, args).items():
+                metrics[key] = value
+                print(f"  {key:<55} {value['value']:>12.3f} {value['unit']}")
+    result = {"environment": environment(), "config": {k: v for k, v in vars(args).items() if k != "func"},
+              "metrics": metrics}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+def compare(args):
+    with open(args.baseline) as f:
+        base = json.load(f)["metrics"]
+    with open(args.candidate) as f:
+        cand = json.load(f)["metrics"]
+    regressions = 0
+    print(f"{'metric':<55} {'baseline':>12} {'candidate':>12} {'change':>8}")
+    for key in sorted(set(base) & set(cand)):
+        b, c = base[key]["value"], cand[key]["value"]
+        change = (c - b) / b if b else 0.0
+        worse = -change if base[key]["higher_is_better"] else change
+        flag = ""
+        if worse > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{key:<55} {b:>12.3f} {c:>12.3f} {change:>+7.1%}{flag}")
+    for key in sorted(set(base) ^ set(cand)):
+        print(f"{key:<55} (only in {'baseline' if key in base else 'candidate'})")
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="GestureAI performance benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Run benchmarks and optionally write JSON results")
+    p_run.add_argument("--output", help="Path of the JSON results file")
+    p_run.add_argument("--only", help="Comma-separated subset of: " + ",".join(BENCHMARKS))
+    p_run.add_argument("--quick", action="store_true", help="Small sizes for a smoke run")
+    p_run.add_argument("--videos", type=int, default=16, help="Number of synthetic clips")
+    p_run.add_argument("--seconds", type=float, default=2.0, help="Length of each synthetic clip")
+    p_run.add_argument("--max-frames", type=int, default=32)
+    p_run.add_argument("--batch-size", type=int, default=4)
+    p_run.add_argument("--workers", type=lambda s: [int(x) for x in s.split(",")], default=[0, 2],
+                       help="DataLoader num_workers values to try, comma-separated")
+    p_run.add_argument("--repeat", type=int, default=5, help="Timed repetitions per benchmark")
+    p_run.add_argument("--word-vocab", type=int, default=16000, help="Word vocabulary size for the decoder benchmark")
+    p_run.add_argument("--subword-vocab", type=int, default=4000, help="Subword vocabulary size for the decoder benchmark")
+    p_run.add_argument("--requests", type=int, default=200, help="Requests per API endpoint")
+    p_run.add_argument("--users", type=int, default=50, help="Seeded users for the API benchmark")
+    p_run.set_defaults(func=run)
+
+    p_cmp = sub.add_parser("compare", help="Compare two result files and flag regressions")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("candidate")
+    p_cmp.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown")
+    p_cmp.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args) or 0)
+
+if __name__ == "__main__":
+    main()
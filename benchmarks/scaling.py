@@ -0,0 +1,154 @@
+"""
+Scaling efficiency of CPU DistributedDataParallel training (gloo backend).
+
+For each process count the driver launches `torchrun` on this file, each rank trains
+ASLTranslator on synthetic clips for a fixed number of steps with a fixed per-rank
+batch (weak scaling), and rank 0 reports the global samples/sec. Efficiency is
+throughput(N) / (N * throughput(1)).
+
+Usage:
+    python benchmarks/scaling.py --procs 1,2,4,8 --output scaling.json
+    python benchmarks/scaling.py --nnodes 2 --node-rank 0 --master-addr 10.0.0.1 --procs 4
+
+The data pipeline is replaced by in-memory tensors so the numbers isolate model
+compute plus gradient all-reduce; use bench.py for decode / DataLoader throughput.
+The output file uses the bench.py format, so `bench.py compare` works on it.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "model"))
+
+# -----------------------------
+# Worker (runs under torchrun)
+# -----------------------------
+def worker(args):
+    import torch
+    import torch.nn as nn
+    from torch.nn.parallel import DistributedDataParallel as DDP
+    import train
+
+    rank, world_size, _ = train.setup_distributed("gloo")
+    torch.manual_seed(0)
+    vocab_size = 1000
+    # One synthetic batch per rank, reused every step: allocating a dataset per rank would
+    # cost gigabytes per process and the data pipeline is not what is being measured here.
+    generator = torch.Generator().manual_seed(rank)
+    videos = torch.rand(args.batch_size, args.frames, 3, 224, 224, generator=generator)
+    captions = torch.randint(4, vocab_size, (args.batch_size, 16), generator=generator)
+
+    model = train.ASLTranslator(vocab_size, train.EMBED_SIZE, train.HIDDEN_SIZE)
+    if world_size > 1:
+        model = DDP(model)
+    criterion = nn.CrossEntropyLoss(ignore_index=0)
+    optimizer = torch.optim.Adam(model.parameters(), lr=train.LEARNING_RATE)
+
+    samples, start = 0, None
+    for step in range(args.warmup + args.steps):
+        if step == args.warmup:
+            if world_size > 1:
+                torch.distributed.barrier()
+            start = time.perf_counter()
+        optimizer.zero_grad()
+        outputs = model(videos, captions[:, :-1])
+        loss = criterion(outputs.reshape(-1, vocab_size), captions[:, 1:].reshape(-1))
+        loss.backward()
+        optimizer.step()
+        if start is not None:
+            samples += videos.size(0)
+    elapsed = time.perf_counter() - start
+    total_samples = train.all_reduce_sum(samples)[0]
+    # Throughput is bounded by the slowest rank.
+    max_elapsed = elapsed
+    if world_size > 1:
+        t = torch.tensor([elapsed])
+        torch.distributed.all_reduce(t, op=torch.distributed.ReduceOp.MAX)
+        max_elapsed = t.item()
+    if rank == 0:
+        with open(args.result, "w") as f:
+            json.dump({"world_size": world_size, "samples_per_s": total_samples / max_elapsed,
+                       "threads_per_rank": torch.get_num_threads()}, f)
+    if world_size > 1:
+        torch.distributed.destroy_process_group()
+
+# -----------------------------
+# Driver
+# -----------------------------
+def launch(args, nproc):
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_path = f.name
+    cmd = [sys.executable, "-m", "torch.distributed.run",
+           f"--nproc_per_node={nproc}", f"--nnodes={args.nnodes}"]
+    if args.nnodes > 1:
+        cmd += [f"--node_rank={args.node_rank}", f"--master_addr={args.master_addr}",
+                f"--master_port={args.master_port}"]
+    else:
+        cmd += ["--standalone"]
+    cmd += [os.path.abspath(__file__), "worker", "--result", result_path,
+            "--steps", str(args.steps), "--warmup", str(args.warmup),
+            "--batch-size", str(args.batch_size), "--frames", str(args.frames)]
+    subprocess.run(cmd, check=True)
+    if args.nnodes > 1 and args.node_rank != 0:
+        return None
+    with open(result_path) as f:
+        result = json.load(f)
+    os.remove(result_path)
+    return result
+
+def drive(args):
+    results = []
+    for nproc in args.procs:
+        print(f"[scaling] {nproc} process(es) per node x {args.nnodes} node(s) ...", flush=True)
+        result = launch(args, nproc)
+        if result is not None:
+            results.append(result)
+    if not results:
+        return
+    base = results[0]["samples_per_s"] / results[0]["world_size"]
+    metrics = {}
+    print(f"{'procs':>6} {'threads/rank':>13} {'samples/s':>11} {'speedup':>8} {'efficiency':>11}")
+    for r in results:
+        n = r["world_size"]
+        speedup = r["samples_per_s"] / base
+        efficiency = speedup / n
+        print(f"{n:>6} {r['threads_per_rank']:>13} {r['samples_per_s']:>11.2f} {speedup:>8.2f} {efficiency:>10.0%}")
+        metrics[f"ddp.world{n}.samples_per_s"] = {"value": r["samples_per_s"], "unit": "samples/s",
+                                                  "higher_is_better": True}
+        metrics[f"ddp.world{n}.efficiency"] = {"value": efficiency, "unit": "ratio",
+                                               "higher_is_better": True}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": {k: v for k, v in vars(args).items() if k != "func"},
+                       "metrics": metrics}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+def main():
+    parser = argparse.ArgumentParser(description="DDP scaling efficiency for ASLTranslator")
+    sub = parser.add_subparsers(dest="command")
+    p_worker = sub.add_parser("worker")
+    p_worker.add_argument("--result", required=True)
+    for p in (parser, p_worker):
+        p.add_argument("--steps", type=int, default=20, help="Timed steps per rank")
+        p.add_argument("--warmup", type=int, default=3, help="Untimed steps per rank")
+        p.add_argument("--batch-size", type=int, default=4, help="Per-rank batch size")
+        p.add_argument("--frames", type=int, default=16, help="Frames per synthetic clip")
+    parser.add_argument("--procs", type=lambda s: [int(x) for x in s.split(",")], default=[1, 2, 4, 8])
+    parser.add_argument("--nnodes", type=int, default=1)
+    parser.add_argument("--node-rank", type=int, default=0)
+    parser.add_argument("--master-addr", default="127.0.0.1")
+    parser.add_argument("--master-port", type=int, default=29500)
+    parser.add_argument("--output", help="Write results in bench.py JSON format")
+    args = parser.parse_args()
+    if args.command == "worker":
+        worker(args)
+    else:
+        drive(args)
+
+if __name__ == "__main__":
+    main()
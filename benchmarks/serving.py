@@ -0,0 +1,183 @@
+"""
+Memory and throughput of the pre-fork server (backend/serve.py) for 1..N workers.
+
+For each worker count the server is started on a trained checkpoint (no database),
+a synthetic clip is posted to /appusers/1/use-model from `--concurrency` client threads
+for `--duration` seconds, and the memory of the parent plus all workers is read from
+/proc: summed RSS (counts shared pages once per process) and summed PSS (shared pages
+split between the processes that map them, i.e. the real footprint).
+
+Usage:
+    python benchmarks/serving.py --checkpoint model/saved_model/best_model.pth --workers 1,2,4
+    python benchmarks/serving.py --checkpoint ... --workers 1,2,4 --modes shared,per-worker --output serving.json
+
+`shared` loads the model once in the parent; `per-worker` (serve.py --no-preload) loads
+it in every worker; `mmap` memory-maps the checkpoint in the parent. Linux only (/proc).
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench import make_synthetic_dataset, metric, percentiles
+
+MODES = {"shared": [], "per-worker": ["--no-preload"], "mmap": ["--mmap"]}
+
+# -----------------------------
+# Process memory
+# -----------------------------
+def process_tree(pid):
+    pids, queue = [], [pid]
+    while queue:
+        p = queue.pop()
+        pids.append(p)
+        try:
+            with open(f"/proc/{p}/task/{p}/children") as f:
+                queue.extend(int(c) for c in f.read().split())
+        except FileNotFoundError:
+            pass
+    return pids
+
+def memory_mb(pid):
+    """(summed RSS, summed PSS) in MB over `pid` and its descendants."""
+    rss = pss = 0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Rss:"):
+                        rss += int(line.split()[1])
+                    elif line.startswith("Pss:"):
+                        pss += int(line.split()[1])
+        except FileNotFoundError:
+            pass
+    return rss / 1024, pss / 1024
+
+# -----------------------------
+# Load generation
+# -----------------------------
+def multipart(clip):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"clip\"; filename=\"clip.mp4\"\r\n"
+            f"Content-Type: video/mp4\r\n\r\n").encode() + clip + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+def wait_ready(port, proc, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/gestureaimodel/registry")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("server did not become ready")
+
+def load(port, clip, concurrency, duration):
+    body, content_type = multipart(clip)
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            conn.request("POST", "/appusers/1/use-model", body=body, headers={"Content-Type": content_type})
+            response = conn.getresponse()
+            response.read()
+            with lock:
+                if response.status == 200:
+                    latencies.append((time.perf_counter() - t0) * 1000.0)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0], time.perf_counter() - start
+
+# -----------------------------
+# Driver
+# -----------------------------
+def run_one(args, mode, workers, clip):
+    cmd = [sys.executable, os.path.join(REPO_ROOT, "backend", "serve.py"), "--workers", str(workers),
+           "--port", str(args.port), "--checkpoint", args.checkpoint, "--log-level", "warning"] + MODES[mode]
+    # Every request posts the same clip, so the inference cache would turn the run into a
+    # cache benchmark; disable both tiers to measure the model path.
+    env = {k: v for k, v in os.environ.items() if k != "GESTUREAI_CACHE_DIR"}
+    env["GESTUREAI_CACHE_ENTRIES"] = "0"
+    proc = subprocess.Popen(cmd, cwd=os.path.join(REPO_ROOT, "backend"), env=env)
+    try:
+        wait_ready(args.port, proc, args.startup_timeout)
+        load(args.port, clip, args.concurrency, args.warmup)  # every worker warm and loaded before timing
+        idle_rss, idle_pss = memory_mb(proc.pid)
+        latencies, errors, elapsed = load(args.port, clip, args.concurrency, args.duration)
+        rss, pss = memory_mb(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait()
+    stats = percentiles(latencies) if latencies else {"p50": 0.0, "p99": 0.0}
+    return {"mode": mode, "workers": workers, "requests_per_s": len(latencies) / elapsed, "errors": errors,
+            "p50_ms": stats["p50"], "p99_ms": stats["p99"], "idle_rss_mb": idle_rss, "idle_pss_mb": idle_pss,
+            "rss_mb": rss, "pss_mb": pss}
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS and throughput of serve.py for 1..N workers")
+    parser.add_argument("--checkpoint", required=True, help="Model file with vocabulary (train.py's best_model.pth)")
+    parser.add_argument("--workers", type=lambda s: [int(x) for x in s.split(",")], default=[1, 2, 4])
+    parser.add_argument("--modes", type=lambda s: s.split(","), default=["shared", "per-worker"],
+                        help="Comma-separated subset of: " + ",".join(MODES))
+    parser.add_argument("--concurrency", type=int, default=8, help="Client threads")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load per configuration")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Untimed seconds of load before measuring")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--clip-seconds", type=float, default=2.0)
+    parser.add_argument("--output", help="Write results in bench.py JSON format")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        make_synthetic_dataset(root, 1, args.clip_seconds)
+        with open(os.path.join(root, "synthetic_0000.mp4"), "rb") as f:
+            clip = f.read()
+
+    rows = []
+    for mode in args.modes:
+        for workers in args.workers:
+            print(f"[serving] {mode}, {workers} worker(s) ...", flush=True)
+            rows.append(run_one(args, mode, workers, clip))
+
+    metrics = {}
+    print(f"{'mode':<12}{'workers':>8}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'RSS MB':>9}{'PSS MB':>9}"
+          f"{'idle PSS':>10}{'errors':>8}")
+    for r in rows:
+        print(f"{r['mode']:<12}{r['workers']:>8}{r['requests_per_s']:>9.2f}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+              f"{r['rss_mb']:>9.0f}{r['pss_mb']:>9.0f}{r['idle_pss_mb']:>10.0f}{r['errors']:>8}")
+        prefix = f"serving.{r['mode']}.workers{r['workers']}"
+        metrics[f"{prefix}.requests_per_s"] = metric(r["requests_per_s"], "req/s", True)
+        metrics[f"{prefix}.p99_ms"] = metric(r["p99_ms"], "ms", False)
+        metrics[f"{prefix}.pss_mb"] = metric(r["pss_mb"], "MB", False)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "metrics": metrics}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -92,12 +92,15 @@ CREATE TABLE Purchases (
 -- ============================================================
 -- Create GestureAIModel table
 -- This table stores details of AI models used in the application.
--- Each model has a unique ID, a name, a version string, and an accuracy metric.
+-- Each model has a unique ID, a name, a version string, and an accuracy metric,
+-- plus the checkpoint artifact used for inference and whether it is the active version.
 -- ============================================================
 
 CREATE TABLE GestureAIModel (
     modelID SERIAL PRIMARY KEY,                        -- Auto-incremented primary key for AI model records.
     modelName VARCHAR(255) NOT NULL,                    -- Name of the AI model.
     version VARCHAR(50) NOT NULL,                       -- Version of the AI model.
-    accuracy FLOAT NOT NULL                             -- Accuracy metric of the model.
+    accuracy FLOAT NOT NULL,                            -- Accuracy metric of the model.
+    artifact_path VARCHAR(1024),                        -- Checkpoint file (weights + vocabulary) for this version.
+    is_active BOOLEAN NOT NULL DEFAULT FALSE            -- Version used by requests that do not pin one.
 );
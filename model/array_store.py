@@ -0,0 +1,86 @@
+import os
+import json
+import numpy as np
+
+# -----------------------------
+# Memory-mapped sequence store
+# -----------------------------
+class ArrayStoreWriter:
+    """
+    Appends variable-length (T, F) sequences to a single flat binary file.
+
+    Layout of a store directory:
+        data.bin    all sequences concatenated row-wise, dtype `dtype`
+        index.json  feature size, dtype, and per-sequence offset/length/metadata
+    The data file is read back with np.memmap, so loading a sequence is a slice,
+    not a file open + decode.
+    """
+    def __init__(self, directory, feature_size, dtype="float16"):
+        self.directory = directory
+        self.feature_size = feature_size
+        self.dtype = np.dtype(dtype)
+        os.makedirs(directory, exist_ok=True)
+        self._data = open(os.path.join(directory, "data.bin"), "wb")
+        self._entries = []
+        self._rows = 0
+        self._closed = False
+
+    def append(self, array, **meta):
+        array = np.ascontiguousarray(array, dtype=self.dtype)
+        assert array.ndim == 2 and array.shape[1] == self.feature_size, array.shape
+        self._data.write(array.tobytes())
+        self._entries.append({"offset": self._rows, "length": int(array.shape[0]), **meta})
+        self._rows += array.shape[0]
+
+    def close(self, **attrs):
+        if self._closed:
+            return
+        self._closed = True
+        self._data.close()
+        index = {"feature_size": self.feature_size, "dtype": self.dtype.name,
+                 "rows": self._rows, "entries": self._entries, **attrs}
+        tmp = os.path.join(self.directory, "index.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(index, f)
+        # The index is written last, so a store without index.json is an incomplete one.
+        os.replace(tmp, os.path.join(self.directory, "index.json"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._data.close()
+
+class ArrayStore:
+    """Read side of ArrayStoreWriter: `store[i]` returns (array view, metadata dict)."""
+    def __init__(self, directory):
+        with open(os.path.join(directory, "index.json")) as f:
+            self.index = json.load(f)
+        self.directory = directory
+        self.entries = self.index["entries"]
+        self.feature_size = self.index["feature_size"]
+        self._data = None
+
+    @property
+    def data(self):
+        # Opened lazily so each DataLoader worker maps the file itself after fork.
+        if self._data is None:
+            self._data = np.memmap(os.path.join(self.directory, "data.bin"), mode="r",
+                                   dtype=self.index["dtype"],
+                                   shape=(self.index["rows"], self.feature_size))
+        return self._data
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, idx):
+        entry = self.entries[idx]
+        return self.data[entry["offset"]:entry["offset"] + entry["length"]], entry
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_data"] = None
+        return state
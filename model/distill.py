@@ -0,0 +1,172 @@
+"""
+Knowledge-distilled compact student for low-latency CPU / on-device inference.
+
+The student keeps the ASLTranslator structure (video encoder -> LSTM decoder) but
+downsamples frames to `resolution` (112 by default) inside the model, replaces the
+4-layer conv stack with depthwise-separable convolutions, and uses narrower LSTMs.
+It is trained by train.py against a frozen teacher's output distribution
+(temperature-softened KL) mixed with the usual cross-entropy on the captions:
+
+    python train.py --distill-from saved_model/best_model.pth \
+                    --student-resolution 112 --student-hidden 256 --student-embed 128
+    python distill.py report --teacher saved_model/best_model.pth --student saved_model/student/best_model.pth
+
+The resolution is stored in the state dict (`encoder.resolution`), so `translator_from_state`
+and the backend load students like any other checkpoint. Both models still take
+224x224 frames, so the data pipeline and the API are unchanged.
+"""
+import argparse
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.utils.data import DataLoader
+
+from train import ASLTranslator, How2SignDataset, collate_fn, VAL_CSV, VAL_DIR, MAX_FRAMES, BATCH_SIZE
+
+STUDENT_RESOLUTION = 112
+STUDENT_HIDDEN = 256
+STUDENT_EMBED = 128
+STUDENT_ENCODED = 128
+STUDENT_CHANNELS = (16, 32, 64)
+DISTILL_ALPHA = 0.5        # Weight of the distillation term (1 - alpha goes to caption cross-entropy)
+DISTILL_TEMPERATURE = 2.0
+
+# -----------------------------
+# Student model
+# -----------------------------
+class DepthwiseSeparableConv(nn.Sequential):
+    """3x3 depthwise conv + 1x1 pointwise conv: ~8-9x fewer multiply-adds than a dense 3x3."""
+    def __init__(self, in_channels, out_channels, stride=2):
+        super().__init__(
+            nn.Conv2d(in_channels, in_channels, kernel_size=3, stride=stride, padding=1, groups=in_channels),
+            nn.ReLU(),
+            nn.Conv2d(in_channels, out_channels, kernel_size=1),
+            nn.ReLU(),
+        )
+
+class CompactCNNEncoder(nn.Module):
+    def __init__(self, encoded_size=STUDENT_ENCODED, channels=STUDENT_CHANNELS):
+        super().__init__()
+        layers = [nn.Conv2d(3, channels[0], kernel_size=3, stride=2, padding=1), nn.ReLU()]
+        for c_in, c_out in zip(channels, channels[1:] + (encoded_size,)):
+            layers.append(DepthwiseSeparableConv(c_in, c_out))
+        self.conv = nn.Sequential(*layers)
+        self.pool = nn.AdaptiveAvgPool2d((1, 1))
+
+    def forward(self, x):
+        return self.pool(self.conv(x)).flatten(1)
+
+class StudentVideoEncoder(nn.Module):
+    """VideoEncoder with in-model downsampling to `resolution` and a depthwise-separable CNN."""
+    def __init__(self, resolution=STUDENT_RESOLUTION, encoded_size=STUDENT_ENCODED, hidden_size=STUDENT_HIDDEN):
+        super().__init__()
+        self.register_buffer("resolution", torch.tensor(resolution))
+        self.cnn = CompactCNNEncoder(encoded_size)
+        self.lstm = nn.LSTM(encoded_size, hidden_size, batch_first=True)
+
+    @classmethod
+    def from_state(cls, state, hidden_size):
+        return cls(int(state["encoder.resolution"]), state["encoder.lstm.weight_ih_l0"].shape[1], hidden_size)
+
+    def forward(self, videos):
+        batch_size, T, C, H, W = videos.shape
+        frames = videos.reshape(batch_size * T, C, H, W)
+        size = int(self.resolution)
+        if (H, W) != (size, size):
+            frames = F.interpolate(frames, size=(size, size), mode="bilinear", align_corners=False, antialias=True)
+        frame_features = self.cnn(frames).view(batch_size, T, -1)
+        _, (h, _) = self.lstm(frame_features)
+        return h[-1]
+
+def build_student(vocab_size, resolution=STUDENT_RESOLUTION, hidden_size=STUDENT_HIDDEN, embed_size=STUDENT_EMBED,
+                  adaptive_cutoffs=None):
+    return ASLTranslator(vocab_size, embed_size, hidden_size,
+                         encoder=StudentVideoEncoder(resolution, STUDENT_ENCODED, hidden_size),
+                         adaptive_cutoffs=adaptive_cutoffs)
+
+# -----------------------------
+# Distillation objective
+# -----------------------------
+def distillation_loss(student, teacher, videos, captions, alpha=DISTILL_ALPHA, temperature=DISTILL_TEMPERATURE,
+                      pad_index=0):
+    """
+    alpha * T^2 * KL(teacher_T || student_T) + (1 - alpha) * CE(student, captions),
+    averaged over non-padding positions. Works with full (logits) and adaptive (log-prob)
+    output heads, since log_softmax of either gives the model's distribution.
+    """
+    inputs, targets = captions[:, :-1], captions[:, 1:]
+    with torch.no_grad():
+        teacher_scores = teacher(videos, inputs)
+    student_scores = student(videos, inputs)
+    mask = targets != pad_index
+    student_scores, teacher_scores = student_scores[mask], teacher_scores[mask]
+    kd = F.kl_div(F.log_softmax(student_scores / temperature, dim=-1),
+                  F.log_softmax(teacher_scores / temperature, dim=-1),
+                  log_target=True, reduction="batchmean") * temperature ** 2
+    ce = F.cross_entropy(student_scores, targets[mask])
+    return alpha * kd + (1 - alpha) * ce
+
+def load_teacher(path, device):
+    """Frozen teacher in eval mode plus its vocabulary (the student must share it)."""
+    from train import translator_from_state
+    from evaluate import load_for_eval
+    state, vocab = load_for_eval(path)
+    if vocab is None:
+        # A rebuilt vocabulary can match in size yet order tokens differently (e.g. --adaptive-softmax
+        # sorts by frequency), which would silently misalign teacher and student logits.
+        raise SystemExit(f"{path} has no vocabulary; distill from a best_model.pth / final_model.pth "
+                         f"or training checkpoint written by train.py")
+    teacher = translator_from_state(state).to(device).eval()
+    for p in teacher.parameters():
+        p.requires_grad_(False)
+    return teacher, vocab
+
+# -----------------------------
+# Report: CPU latency, size and BLEU vs the teacher
+# -----------------------------
+def report(args):
+    from train import translator_from_state
+    from evaluate import evaluate, load_for_eval, count_parameters, model_size_mb
+
+    torch.set_num_threads(args.threads)
+    cpu = torch.device("cpu")
+    rows = []
+    vocab = None
+    for name, path in (("teacher", args.teacher), ("student", args.student)):
+        state, model_vocab = load_for_eval(path)
+        vocab = vocab or model_vocab
+        if vocab is None:
+            raise SystemExit(f"{path} has no vocabulary; use a training checkpoint")
+        model = translator_from_state(state).to(cpu)
+        loader = DataLoader(How2SignDataset(args.val_csv, args.val_dir, vocab, max_frames=MAX_FRAMES),
+                            batch_size=BATCH_SIZE, collate_fn=collate_fn, num_workers=args.num_workers)
+        stats = evaluate(model, loader, vocab, max_batches=args.max_batches, device=cpu)
+        stats.update(name=name, params=count_parameters(model), size_mb=model_size_mb(model))
+        rows.append(stats)
+
+    teacher = rows[0]
+    print(f"CPU, {args.threads} thread(s), {teacher['clips']} clips")
+    print(f"{'model':<9}{'params':>12}{'size MB':>9}{'ms/clip p50':>13}{'ms/clip mean':>14}{'speedup':>9}"
+          f"{'val loss':>10}{'BLEU':>7}{'dBLEU':>7}")
+    for r in rows:
+        print(f"{r['name']:<9}{r['params']:>12,}{r['size_mb']:>9.1f}{r['latency_ms_p50']:>13.1f}"
+              f"{r['latency_ms_mean']:>14.1f}{teacher['latency_ms_p50'] / r['latency_ms_p50']:>9.2f}"
+              f"{r['val_loss']:>10.4f}{r['bleu']:>7.2f}{r['bleu'] - teacher['bleu']:>+7.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Distilled student model tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_report = sub.add_parser("report", help="CPU latency per clip, model size and BLEU: student vs teacher")
+    p_report.add_argument("--teacher", required=True, help="Teacher training checkpoint (with vocabulary)")
+    p_report.add_argument("--student", required=True, help="Student checkpoint")
+    p_report.add_argument("--val-csv", default=VAL_CSV)
+    p_report.add_argument("--val-dir", default=VAL_DIR)
+    p_report.add_argument("--max-batches", type=int, default=50)
+    p_report.add_argument("--threads", type=int, default=1, help="torch CPU threads (1 approximates a phone core)")
+    p_report.add_argument("--num-workers", type=int, default=2)
+    args = parser.parse_args()
+    report(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import math
+import time
+from collections import Counter
+
+import torch
+
+from train import DEVICE, vocabulary_from_state
+
+# -----------------------------
+# BLEU
+# -----------------------------
+def _ngrams(tokens, n):
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+def corpus_bleu(references, hypotheses, max_n=4):
+    """
+    Corpus-level BLEU-4 with brevity penalty (one reference per hypothesis).
+    `references` and `hypotheses` are lists of token lists. Returns a score in [0, 100].
+    """
+    matches = [0] * max_n
+    totals = [0] * max_n
+    ref_len = hyp_len = 0
+    for ref, hyp in zip(references, hypotheses):
+        ref_len += len(ref)
+        hyp_len += len(hyp)
+        for n in range(1, max_n + 1):
+            hyp_ngrams = _ngrams(hyp, n)
+            ref_ngrams = _ngrams(ref, n)
+            matches[n - 1] += sum(min(c, ref_ngrams[g]) for g, c in hyp_ngrams.items())
+            totals[n - 1] += max(len(hyp) - n + 1, 0)
+    if hyp_len == 0 or min(matches) == 0:
+        return 0.0
+    log_precision = sum(math.log(m / t) for m, t in zip(matches, totals)) / max_n
+    brevity = 1.0 if hyp_len > ref_len else math.exp(1 - ref_len / hyp_len)
+    return 100.0 * brevity * math.exp(log_precision)
+
+# -----------------------------
+# Model evaluation
+# -----------------------------
+def decode_tokens(token_ids, vocab):
+    """Token ids -> words. BLEU is always scored on words so word and subword models compare fairly."""
+    return vocab.decode(token_ids).split()
+
+def strip_special(token_ids, vocab):
+    special = {vocab.word2idx["<PAD>"], vocab.word2idx["<SOS>"], vocab.word2idx["<EOS>"]}
+    return [t for t in token_ids if t not in special]
+
+def evaluate(model, loader, vocab, max_len=50, max_batches=None, device=DEVICE):
+    """
+    Teacher-forced loss, greedy-decoding BLEU and per-clip latency over `loader`
+    (on `device`; the model must already be there).
+
+    Returns a dict with val_loss, bleu, clips, and encode/decode latency in ms per clip.
+    """
+    model.eval()
+    total_loss, batches = 0.0, 0
+    references, hypotheses = [], []
+    clip_ms = []
+    with torch.no_grad():
+        for i, batch in enumerate(loader):
+            if max_batches is not None and i >= max_batches:
+                break
+            if batch is None:
+                continue
+            inputs, captions = batch
+            inputs, captions = inputs.to(device), captions.to(device)
+            total_loss += model(inputs, captions[:, :-1], targets=captions[:, 1:]).item()
+            batches += 1
+            for j in range(inputs.size(0)):
+                start = time.perf_counter()
+                generated = model.generate_caption(inputs[j:j + 1], max_len, vocab)
+                clip_ms.append((time.perf_counter() - start) * 1000.0)
+                hypotheses.append(decode_tokens(generated, vocab))
+                references.append(decode_tokens(strip_special(captions[j].tolist(), vocab), vocab))
+    clip_ms.sort()
+    return {
+        "val_loss": total_loss / max(batches, 1),
+        "bleu": corpus_bleu(references, hypotheses),
+        "clips": len(hypotheses),
+        "latency_ms_p50": clip_ms[len(clip_ms) // 2] if clip_ms else 0.0,
+        "latency_ms_mean": sum(clip_ms) / len(clip_ms) if clip_ms else 0.0,
+    }
+
+def load_for_eval(path, mmap=False):
+    """
+    Load weights from a model file written by train.py (best_model.pth / final_model.pth:
+    weights + vocabulary), a resumable training checkpoint, or a bare state dict from older
+    runs. Returns (state_dict, vocab); vocab is None for bare state dicts.
+
+    With `mmap=True` tensors stay backed by the checkpoint file (read-only page cache
+    shared by every process that maps it) instead of being copied into private memory.
+    """
+    checkpoint = torch.load(path, map_location="cpu", weights_only=False, mmap=mmap)
+    if isinstance(checkpoint, dict) and "model" in checkpoint and "vocab" in checkpoint:
+        return checkpoint["model"], vocabulary_from_state(checkpoint["vocab"])
+    return checkpoint, None
+
+def count_parameters(model):
+    return sum(p.numel() for p in model.parameters())
+
+def model_size_mb(model):
+    return sum(p.numel() * p.element_size() for p in model.parameters()) / 2**20
+
+# -----------------------------
+# Checkpoint comparison
+# -----------------------------
+def main():
+    import argparse
+    from torch.utils.data import DataLoader
+    from train import How2SignDataset, translator_from_state, collate_fn, VAL_CSV, VAL_DIR, MAX_FRAMES, BATCH_SIZE
+
+    parser = argparse.ArgumentParser(description="Compare training checkpoints on the validation split "
+                                                 "(e.g. word vs subword vocabularies, full vs adaptive softmax)")
+    parser.add_argument("checkpoints", nargs="+", help="Training checkpoints (with vocabulary)")
+    parser.add_argument("--val-csv", default=VAL_CSV)
+    parser.add_argument("--val-dir", default=VAL_DIR)
+    parser.add_argument("--max-batches", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'checkpoint':<40}{'vocab':>8}{'head':>10}{'size MB':>9}{'ms/clip':>9}{'val loss':>10}{'BLEU':>7}")
+    for path in args.checkpoints:
+        state, vocab = load_for_eval(path)
+        if vocab is None:
+            parser.error(f"{path} has no vocabulary; use a training checkpoint")
+        model = translator_from_state(state).to(DEVICE)
+        loader = DataLoader(How2SignDataset(args.val_csv, args.val_dir, vocab, max_frames=MAX_FRAMES),
+                            batch_size=BATCH_SIZE, collate_fn=collate_fn)
+        stats = evaluate(model, loader, vocab, max_batches=args.max_batches)
+        head = "adaptive" if model.decoder.adaptive is not None else "full"
+        print(f"{path[-40:]:<40}{len(vocab.word2idx):>8}{head:>10}{model_size_mb(model):>9.1f}"
+              f"{stats['latency_ms_p50']:>9.1f}{stats['val_loss']:>10.4f}{stats['bleu']:>7.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Frozen-encoder feature cache for fast decoder-side experiments.
+
+A trained CNNEncoder is run once over every clip and the per-frame embeddings
+(`encoded_size` values per frame) are written to a memory-mapped ArrayStore. Training
+can then skip the CNN entirely: only the encoder LSTM and the Decoder are trained.
+
+    python feature_cache.py build --checkpoint saved_model/best_model.pth \
+                                  --csv /Volumes/Arun/how2sign_train.csv --video-dir /Volumes/Arun/train_raw \
+                                  --out /Volumes/Arun/features/train
+    python train.py --features-train /Volumes/Arun/features/train --features-val /Volumes/Arun/features/val \
+                    --init-from saved_model/best_model.pth           # writes to saved_model/features/
+    python feature_cache.py export --checkpoint saved_model/best_model.pth \
+                                   --decoder-checkpoint saved_model/features/final_model.pth --out full_model.pth
+
+`--init-from` copies the decoder's embedding and output head only when the checkpoint's
+vocabulary (stored in train.py's model files) matches the run's.
+
+Captions are kept as text in the store, so vocabularies can change without rebuilding it.
+"""
+import time
+import argparse
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import Dataset, DataLoader
+
+from train import (How2SignDataset, ASLTranslator, Vocabulary, translator_from_state, MAX_FRAMES, EMBED_SIZE,
+                   HIDDEN_SIZE, DEVICE)
+from array_store import ArrayStore, ArrayStoreWriter
+from evaluate import load_for_eval
+
+ENCODED_SIZE = 256  # Output width of CNNEncoder as built by ASLTranslator
+
+# -----------------------------
+# Building the cache
+# -----------------------------
+def _collate_frames(batch):
+    # Concatenate all frames of all clips so the CNN runs on one large batch; keep clip lengths.
+    frames = [b[0] for b in batch]
+    return torch.cat(frames, dim=0), [f.shape[0] for f in frames]
+
+def build(checkpoint, csv_path, video_dir, out_dir, clips_per_batch=8, num_workers=4, dtype="float16"):
+    state, vocab = load_for_eval(checkpoint)
+    model = translator_from_state(state)
+    cnn = model.encoder.cnn.to(DEVICE).eval()
+
+    # The dataset only needs a vocabulary to build caption tensors, which are discarded here.
+    dataset = How2SignDataset(csv_path, video_dir, vocab or Vocabulary(), max_frames=MAX_FRAMES)
+    loader = DataLoader(dataset, batch_size=clips_per_batch, shuffle=False,
+                        num_workers=num_workers, collate_fn=_collate_frames)
+    clip_idx = 0
+    start = time.perf_counter()
+    with ArrayStoreWriter(out_dir, ENCODED_SIZE, dtype=dtype) as writer, torch.no_grad():
+        for frames, lengths in loader:
+            features = cnn(frames.to(DEVICE)).cpu().numpy()
+            for clip_features in np.split(features, np.cumsum(lengths)[:-1]):
+                row = dataset.samples[clip_idx]
+                writer.append(clip_features, name=row['SENTENCE_NAME'], sentence=str(row['SENTENCE']))
+                clip_idx += 1
+            print(f"  {clip_idx}/{len(dataset)} clips ({clip_idx / (time.perf_counter() - start):.1f} clips/s)")
+        writer.close(source_checkpoint=checkpoint)
+    print(f"Cached {clip_idx} clips to {out_dir}")
+
+# -----------------------------
+# Training on cached features
+# -----------------------------
+class FeatureDataset(Dataset):
+    """Cached per-frame CNN features as (T, ENCODED_SIZE) float tensors plus caption ids."""
+    def __init__(self, store_dir, vocab, max_frames=MAX_FRAMES):
+        self.store = ArrayStore(store_dir)
+        self.vocab = vocab
+        self.max_frames = max_frames
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, idx):
+        features, entry = self.store[idx]
+        frames = torch.from_numpy(np.asarray(features[:self.max_frames], dtype=np.float32))
+        tokens = [self.vocab.word2idx["<SOS>"]]
+        tokens += self.vocab.numericalize(entry["sentence"])
+        tokens.append(self.vocab.word2idx["<EOS>"])
+        return frames, torch.tensor(tokens, dtype=torch.long)
+
+class CachedFeatureEncoder(nn.Module):
+    """
+    VideoEncoder without the CNN: consumes cached (batch, T, encoded_size) features.
+    Parameter names match VideoEncoder's LSTM, so weights move between the two.
+    """
+    def __init__(self, encoded_size=ENCODED_SIZE, hidden_size=512):
+        super().__init__()
+        self.lstm = nn.LSTM(encoded_size, hidden_size, batch_first=True)
+
+    def forward(self, features):
+        _, (h, _) = self.lstm(features)
+        return h[-1]
+
+def build_cached_feature_model(vocab_size, embed_size=EMBED_SIZE, hidden_size=HIDDEN_SIZE, adaptive_cutoffs=None):
+    return ASLTranslator(vocab_size, embed_size, hidden_size,
+                         encoder=CachedFeatureEncoder(ENCODED_SIZE, hidden_size), adaptive_cutoffs=adaptive_cutoffs)
+
+def load_matching(model, state, skip_prefixes=()):
+    """
+    Copy every parameter whose name and shape match (e.g. encoder LSTM and decoder from a pixel model),
+    except those under `skip_prefixes`.
+    """
+    own = model.state_dict()
+    matched = {k: v for k, v in state.items()
+               if k in own and own[k].shape == v.shape and not k.startswith(tuple(skip_prefixes))}
+    own.update(matched)
+    model.load_state_dict(own)
+    return sorted(matched)
+
+# -----------------------------
+# Export back to a full pixel model
+# -----------------------------
+def export(checkpoint, decoder_checkpoint, out_path):
+    """Combine the frozen CNN from `checkpoint` with the LSTM/decoder trained on cached features."""
+    base, _ = load_for_eval(checkpoint)
+    tuned, vocab = load_for_eval(decoder_checkpoint)
+    merged = {k: v for k, v in base.items() if k.startswith("encoder.cnn.")}
+    merged.update(tuned)
+    translator_from_state(merged)  # validates the key set
+    torch.save({"model": merged, "vocab": vocab.state_dict()} if vocab is not None else merged, out_path)
+    print(f"Full model written to {out_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Frozen CNN feature cache")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="Run a trained CNNEncoder over a split and cache per-frame features")
+    p_build.add_argument("--checkpoint", required=True)
+    p_build.add_argument("--csv", required=True)
+    p_build.add_argument("--video-dir", required=True)
+    p_build.add_argument("--out", required=True)
+    p_build.add_argument("--clips-per-batch", type=int, default=8)
+    p_build.add_argument("--num-workers", type=int, default=4)
+    p_build.add_argument("--dtype", default="float16", choices=["float16", "float32"])
+    p_export = sub.add_parser("export", help="Merge a cached-feature model back into a full pixel model")
+    p_export.add_argument("--checkpoint", required=True, help="Model whose CNN produced the cache")
+    p_export.add_argument("--decoder-checkpoint", required=True, help="Model trained on cached features")
+    p_export.add_argument("--out", required=True)
+    args = parser.parse_args()
+    if args.command == "build":
+        build(args.checkpoint, args.csv, args.video_dir, args.out, args.clips_per_batch, args.num_workers, args.dtype)
+    else:
+        export(args.checkpoint, args.decoder_checkpoint, args.out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Landmark-based input pipeline: hand / pose / face keypoints instead of raw 224x224 frames.
+
+    # one-off preprocessing (MediaPipe Holistic, one process per core)
+    python landmarks.py extract --csv /Volumes/Arun/how2sign_train.csv --video-dir /Volumes/Arun/train_raw \
+                                --out /Volumes/Arun/landmarks/train
+    # train on landmarks
+    python train.py --landmarks-train /Volumes/Arun/landmarks/train --landmarks-val /Volumes/Arun/landmarks/val
+                    # writes to saved_model/landmarks/, leaving the pixel model's files alone
+    # side-by-side accuracy / throughput against the pixel model
+    python landmarks.py compare --pixel-checkpoint saved_model/best_model.pth \
+                                --landmark-checkpoint saved_model/landmarks/best_model.pth \
+                                --landmarks-val /Volumes/Arun/landmarks/val
+
+Each frame becomes LANDMARK_FEATURES float16 values (~0.7 KB) instead of a 224x224x3
+float32 tensor (~590 KB), and per-clip loading is a memory-mapped slice.
+"""
+import os
+import time
+import argparse
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn as nn
+from torch.utils.data import Dataset, DataLoader
+
+from train import (Vocabulary, How2SignDataset, ASLTranslator, translator_from_state, state_head_config,
+                   collate_fn, TRAIN_CSV, VAL_CSV, VAL_DIR,
+                   MAX_FRAMES, FPS, EMBED_SIZE, HIDDEN_SIZE, BATCH_SIZE, DEVICE)
+from array_store import ArrayStore, ArrayStoreWriter
+
+# -----------------------------
+# Landmark layout
+# -----------------------------
+POSE_POINTS = 33
+HAND_POINTS = 21
+# Subset of the 468-point face mesh that carries signing information:
+# lips, eyebrows, eye corners/lids and the nose tip.
+FACE_POINTS = [61, 146, 91, 181, 84, 17, 314, 405, 321, 375, 291, 185, 40, 39, 37, 0, 267, 269, 270, 409,
+               70, 63, 105, 66, 107, 336, 296, 334, 293, 300,
+               33, 133, 159, 145, 362, 263, 386, 374,
+               1]
+COORDS = 3  # x, y, z
+NUM_POINTS = POSE_POINTS + 2 * HAND_POINTS + len(FACE_POINTS)
+LANDMARK_FEATURES = NUM_POINTS * COORDS
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+
+def _points(landmarks, count, indices=None):
+    # Missing detections (e.g. a hand out of frame) are left as zeros.
+    out = np.zeros((count, COORDS), dtype=np.float32)
+    if landmarks is not None:
+        points = landmarks.landmark
+        for i, idx in enumerate(indices if indices is not None else range(count)):
+            p = points[idx]
+            out[i] = (p.x, p.y, p.z)
+    return out
+
+def frame_landmarks(results):
+    """Flatten one MediaPipe Holistic result into a (LANDMARK_FEATURES,) vector."""
+    return np.concatenate([
+        _points(results.pose_landmarks, POSE_POINTS),
+        _points(results.left_hand_landmarks, HAND_POINTS),
+        _points(results.right_hand_landmarks, HAND_POINTS),
+        _points(results.face_landmarks, len(FACE_POINTS), FACE_POINTS),
+    ]).reshape(-1)
+
+def normalize_landmarks(frames):
+    """
+    Make (T, LANDMARK_FEATURES) landmarks position/scale invariant: centre on the
+    shoulder midpoint and divide by shoulder width. Undetected points stay zero.
+    """
+    pts = frames.reshape(frames.shape[0], NUM_POINTS, COORDS).astype(np.float32)
+    present = np.any(pts != 0, axis=2, keepdims=True)
+    centre = (pts[:, LEFT_SHOULDER] + pts[:, RIGHT_SHOULDER]) / 2.0
+    width = np.linalg.norm(pts[:, LEFT_SHOULDER, :2] - pts[:, RIGHT_SHOULDER, :2], axis=1)
+    width = np.where(width > 1e-6, width, 1.0)
+    pts = (pts - centre[:, None, :]) / width[:, None, None]
+    return np.where(present, pts, 0.0).reshape(frames.shape[0], -1)
+
+# -----------------------------
+# Extraction (one MediaPipe graph per clip, MediaPipe imported once per worker process)
+# -----------------------------
+_mp_holistic = None
+
+def _init_extractor():
+    global _mp_holistic
+    import mediapipe as mp
+    _mp_holistic = mp.solutions.holistic
+
+def extract_clip(task):
+    """Run Holistic over one clip segment; returns (landmarks float16 (T, F), metadata)."""
+    video_file, start_frame, end_frame, meta = task
+    # Video mode tracks landmarks from frame to frame; a fresh graph per clip keeps the
+    # previous clip's tracking state from leaking into this one's first frames.
+    with _mp_holistic.Holistic(static_image_mode=False, model_complexity=1) as holistic:
+        frames = _clip_landmarks(holistic, video_file, start_frame, end_frame)
+    return frames, meta
+
+def _clip_landmarks(holistic, video_file, start_frame, end_frame):
+    cap = cv2.VideoCapture(video_file)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if start_frame >= total_frames:
+        start_frame = 0
+    end_frame = min(end_frame, total_frames)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    frames = []
+    for _ in range(start_frame, end_frame):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame_landmarks(holistic.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))))
+    cap.release()
+    if not frames:
+        frames.append(np.zeros(LANDMARK_FEATURES, dtype=np.float32))
+    return np.stack(frames).astype(np.float16)
+
+def extract(csv_path, video_dir, out_dir, workers=None):
+    dataset = How2SignDataset(csv_path, video_dir, vocab=None)
+    tasks = []
+    for row in dataset.samples:
+        tasks.append((os.path.join(video_dir, f"{row['VIDEO_NAME']}.mp4"),
+                      int(float(row['START']) * FPS), int(float(row['END']) * FPS),
+                      {"name": row['SENTENCE_NAME'], "sentence": str(row['SENTENCE'])}))
+    start = time.perf_counter()
+    with ArrayStoreWriter(out_dir, LANDMARK_FEATURES) as writer, \
+            Pool(workers or os.cpu_count(), initializer=_init_extractor) as pool:
+        # Ordered imap keeps the store in CSV order; chunks amortise IPC.
+        for i, (landmarks, meta) in enumerate(pool.imap(extract_clip, tasks, chunksize=4)):
+            writer.append(landmarks, **meta)
+            if (i + 1) % 100 == 0:
+                print(f"  {i + 1}/{len(tasks)} clips ({(i + 1) / (time.perf_counter() - start):.1f} clips/s)")
+    print(f"Extracted {len(tasks)} clips to {out_dir}")
+
+# -----------------------------
+# Dataset and encoder
+# -----------------------------
+class LandmarkDataset(Dataset):
+    """Clips from a landmark store as (T, LANDMARK_FEATURES) float tensors plus caption ids."""
+    def __init__(self, store_dir, vocab, max_frames=MAX_FRAMES):
+        self.store = ArrayStore(store_dir)
+        self.vocab = vocab
+        self.max_frames = max_frames
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, idx):
+        landmarks, entry = self.store[idx]
+        frames = normalize_landmarks(np.asarray(landmarks[:self.max_frames]))
+        tokens = [self.vocab.word2idx["<SOS>"]]
+        tokens += self.vocab.numericalize(entry["sentence"])
+        tokens.append(self.vocab.word2idx["<EOS>"])
+        return torch.from_numpy(frames), torch.tensor(tokens, dtype=torch.long)
+
+class LandmarkEncoder(nn.Module):
+    """
+    Drop-in replacement for VideoEncoder over landmark sequences: a per-frame MLP
+    projects keypoints to `encoded_size`, followed by the same LSTM summariser.
+    """
+    def __init__(self, in_features=LANDMARK_FEATURES, encoded_size=256, hidden_size=512):
+        super().__init__()
+        self.frame_mlp = nn.Sequential(
+            nn.Linear(in_features, encoded_size),
+            nn.ReLU(),
+            nn.Linear(encoded_size, encoded_size),
+            nn.ReLU(),
+        )
+        self.lstm = nn.LSTM(encoded_size, hidden_size, batch_first=True)
+
+    def forward(self, landmarks):
+        frame_features = self.frame_mlp(landmarks)  # (batch, T, encoded_size)
+        _, (h, _) = self.lstm(frame_features)
+        return h[-1]
+
+def build_landmark_model(vocab_size, embed_size=EMBED_SIZE, hidden_size=HIDDEN_SIZE, adaptive_cutoffs=None):
+    return ASLTranslator(vocab_size, embed_size, hidden_size,
+                         encoder=LandmarkEncoder(encoded_size=256, hidden_size=hidden_size),
+                         adaptive_cutoffs=adaptive_cutoffs)
+
+# -----------------------------
+# Side-by-side comparison
+# -----------------------------
+def _loader_throughput(loader, max_batches):
+    clips, start = 0, time.perf_counter()
+    for i, batch in enumerate(loader):
+        if i >= max_batches:
+            break
+        clips += batch[0].size(0)
+    return clips / (time.perf_counter() - start)
+
+def compare(args):
+    from evaluate import evaluate, load_for_eval, count_parameters, model_size_mb
+
+    pixel_state, vocab = load_for_eval(args.pixel_checkpoint)
+    landmark_state, landmark_vocab = load_for_eval(args.landmark_checkpoint)
+    if vocab is None:
+        vocab = landmark_vocab
+    if vocab is None:
+        train_df = pd.read_csv(TRAIN_CSV, sep='\t', header=None,
+                               names=['VIDEO_ID', 'VIDEO_NAME', 'SENTENCE_ID', 'SENTENCE_NAME', 'START', 'END', 'SENTENCE'])
+        vocab = Vocabulary(freq_threshold=1)
+        vocab.build_vocabulary(train_df['SENTENCE'].astype(str).tolist())
+
+    pixel_model = translator_from_state(pixel_state).to(DEVICE)
+    vocab_size, cutoffs = state_head_config(landmark_state)
+    landmark_model = build_landmark_model(vocab_size, adaptive_cutoffs=cutoffs).to(DEVICE)
+    landmark_model.load_state_dict(landmark_state)
+
+    pixel_loader = DataLoader(How2SignDataset(args.val_csv, args.val_dir, vocab, max_frames=MAX_FRAMES),
+                              batch_size=BATCH_SIZE, collate_fn=collate_fn, num_workers=args.num_workers)
+    landmark_loader = DataLoader(LandmarkDataset(args.landmarks_val, vocab, max_frames=MAX_FRAMES),
+                                 batch_size=BATCH_SIZE, collate_fn=collate_fn, num_workers=args.num_workers)
+
+    rows = []
+    for name, model, loader, bytes_per_frame in (
+            ("pixel", pixel_model, pixel_loader, 3 * 224 * 224 * 4),
+            ("landmark", landmark_model, landmark_loader, LANDMARK_FEATURES * 4)):
+        stats = evaluate(model, loader, vocab, max_batches=args.max_batches)
+        stats.update(name=name, params=count_parameters(model), size_mb=model_size_mb(model),
+                     input_kb_per_frame=bytes_per_frame / 1024,
+                     load_clips_per_s=_loader_throughput(loader, args.max_batches))
+        rows.append(stats)
+
+    print(f"{'input':<10}{'params':>12}{'size MB':>9}{'KB/frame':>10}{'load clips/s':>14}"
+          f"{'ms/clip':>9}{'val loss':>10}{'BLEU':>7}")
+    for r in rows:
+        print(f"{r['name']:<10}{r['params']:>12,}{r['size_mb']:>9.1f}{r['input_kb_per_frame']:>10.1f}"
+              f"{r['load_clips_per_s']:>14.1f}{r['latency_ms_p50']:>9.1f}{r['val_loss']:>10.4f}{r['bleu']:>7.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Landmark preprocessing and comparison")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_ext = sub.add_parser("extract", help="Extract landmarks for every clip in a How2Sign CSV")
+    p_ext.add_argument("--csv", required=True)
+    p_ext.add_argument("--video-dir", required=True)
+    p_ext.add_argument("--out", required=True, help="Output landmark store directory")
+    p_ext.add_argument("--workers", type=int, default=None)
+    p_cmp = sub.add_parser("compare", help="Compare pixel and landmark models on the validation split")
+    p_cmp.add_argument("--pixel-checkpoint", required=True)
+    p_cmp.add_argument("--landmark-checkpoint", required=True)
+    p_cmp.add_argument("--landmarks-val", required=True)
+    p_cmp.add_argument("--val-csv", default=VAL_CSV)
+    p_cmp.add_argument("--val-dir", default=VAL_DIR)
+    p_cmp.add_argument("--max-batches", type=int, default=50)
+    p_cmp.add_argument("--num-workers", type=int, default=0)
+    args = parser.parse_args()
+    if args.command == "extract":
+        extract(args.csv, args.video_dir, args.out, args.workers)
+    else:
+        compare(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Motion-aware frame skipping for live inference.
+
+Consecutive camera frames are often nearly identical. Each frame is reduced to a tiny
+grayscale thumbnail and compared with the last *kept* frame; only frames that moved
+more than `threshold` (mean absolute difference, 0-1 scale) are passed to VideoEncoder.
+If more than `max_frames` survive, the most motion-rich ones are kept in temporal order.
+
+    # savings vs accuracy on the validation split
+    python motion.py evaluate --checkpoint saved_model/ckpt.pt --thresholds 0,0.005,0.01,0.02,0.04
+"""
+import time
+import argparse
+
+import torch.nn.functional as F
+from torch.utils.data import DataLoader
+
+from train import How2SignDataset, translator_from_state, VAL_CSV, VAL_DIR, MAX_FRAMES, DEVICE
+
+MOTION_THRESHOLD = 0.01   # Default mean-abs-difference needed to keep a frame
+THUMBNAIL_SIZE = 32       # Side of the grayscale thumbnail used for the difference metric
+MIN_FRAMES = 4            # Never hand the encoder fewer frames than this
+
+# -----------------------------
+# Difference metric
+# -----------------------------
+def thumbnails(frames):
+    """(T, 3, H, W) frames in [0, 1] -> (T, THUMBNAIL_SIZE * THUMBNAIL_SIZE) grayscale thumbnails."""
+    gray = frames.mean(dim=1, keepdim=True)
+    return F.adaptive_avg_pool2d(gray, THUMBNAIL_SIZE).flatten(1)
+
+def select_frames(frames, threshold=MOTION_THRESHOLD, max_frames=MAX_FRAMES, min_frames=MIN_FRAMES):
+    """
+    Return the indices of the frames to encode.
+
+    The first frame is always kept; each later frame is kept when its thumbnail differs
+    from the last kept thumbnail by more than `threshold`. The result is topped up to
+    `min_frames` and capped at `max_frames` by motion score, preserving temporal order.
+    """
+    T = frames.shape[0]
+    if T == 0:
+        return []
+    thumbs = thumbnails(frames)
+    kept, scores = [0], {0: float("inf")}
+    reference = thumbs[0]
+    for t in range(1, T):
+        diff = (thumbs[t] - reference).abs().mean().item()
+        scores[t] = diff
+        if diff > threshold:
+            kept.append(t)
+            reference = thumbs[t]
+    if len(kept) < min(min_frames, T):
+        # Very still clips: add the frames with the most motion we skipped.
+        extra = sorted((t for t in range(T) if t not in kept), key=lambda t: -scores[t])
+        kept = sorted(kept + extra[:min(min_frames, T) - len(kept)])
+    if len(kept) > max_frames:
+        kept = sorted(sorted(kept, key=lambda t: -scores[t])[:max_frames])
+    return kept
+
+# -----------------------------
+# Validation: compute savings vs accuracy
+# -----------------------------
+def evaluate_thresholds(model, dataset, vocab, thresholds, max_clips):
+    from evaluate import corpus_bleu, decode_tokens, strip_special
+
+    loader = DataLoader(dataset, batch_size=1, shuffle=False)
+    clips = []
+    for i, (frames, caption) in enumerate(loader):
+        if i >= max_clips:
+            break
+        clips.append((frames[0], decode_tokens(strip_special(caption[0].tolist(), vocab), vocab)))
+
+    results = []
+    model.eval()
+    for threshold in thresholds:
+        references, hypotheses = [], []
+        frames_in = frames_kept = 0
+        start = time.perf_counter()
+        for frames, reference in clips:
+            # threshold < 0 disables skipping (baseline: every decoded frame is encoded).
+            keep = list(range(frames.shape[0])) if threshold < 0 else select_frames(frames, threshold)
+            frames_in += frames.shape[0]
+            frames_kept += len(keep)
+            hypotheses.append(decode_tokens(model.generate_caption(frames[keep].unsqueeze(0).to(DEVICE), 50, vocab), vocab))
+            references.append(reference)
+        elapsed = time.perf_counter() - start
+        results.append({"threshold": threshold, "frames_decoded": frames_in / max(len(clips), 1),
+                        "frames_encoded": frames_kept / max(len(clips), 1),
+                        "ms_per_clip": 1000.0 * elapsed / max(len(clips), 1),
+                        "bleu": corpus_bleu(references, hypotheses)})
+    return results
+
+def main():
+    from evaluate import load_for_eval
+
+    parser = argparse.ArgumentParser(description="Motion-aware frame skipping")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_eval = sub.add_parser("evaluate", help="Report compute savings and BLEU per threshold on the validation split")
+    p_eval.add_argument("--checkpoint", required=True, help="Training checkpoint with vocabulary")
+    p_eval.add_argument("--thresholds", default="0.005,0.01,0.02,0.04",
+                        type=lambda s: [float(x) for x in s.split(",")])
+    p_eval.add_argument("--val-csv", default=VAL_CSV)
+    p_eval.add_argument("--val-dir", default=VAL_DIR)
+    p_eval.add_argument("--max-clips", type=int, default=200)
+    p_eval.add_argument("--decode-frames", type=int, default=MAX_FRAMES * 3,
+                        help="Frames decoded per clip before skipping (skipping then caps at MAX_FRAMES)")
+    args = parser.parse_args()
+
+    state, vocab = load_for_eval(args.checkpoint)
+    if vocab is None:
+        parser.error("checkpoint has no vocabulary; use a training checkpoint")
+    model = translator_from_state(state).to(DEVICE)
+    dataset = How2SignDataset(args.val_csv, args.val_dir, vocab, max_frames=args.decode_frames)
+
+    # Baseline first: all of the first MAX_FRAMES frames, as in training.
+    baseline_dataset = How2SignDataset(args.val_csv, args.val_dir, vocab, max_frames=MAX_FRAMES)
+    rows = evaluate_thresholds(model, baseline_dataset, vocab, [-1.0], args.max_clips)
+    rows += evaluate_thresholds(model, dataset, vocab, args.thresholds, args.max_clips)
+    base = rows[0]
+    print(f"{'threshold':>10}{'decoded/clip':>14}{'encoded/clip':>14}{'ms/clip':>10}{'speedup':>9}{'BLEU':>7}{'dBLEU':>7}")
+    for r in rows:
+        label = "all" if r["threshold"] < 0 else f"{r['threshold']:.3f}"
+        print(f"{label:>10}{r['frames_decoded']:>14.1f}{r['frames_encoded']:>14.1f}{r['ms_per_clip']:>10.1f}"
+              f"{base['ms_per_clip'] / r['ms_per_clip']:>9.2f}{r['bleu']:>7.2f}{r['bleu'] - base['bleu']:>+7.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Sharded sequential dataset for slow (external / spinning) volumes.
+
+Random access across thousands of mp4s is seek-bound. `pack` decodes every clip once
+(same preprocessing as How2SignDataset) and writes the uint8 frames plus caption into
+large tar shards that are read strictly front to back:
+
+    shard-000000.tar   000000000.json  {"name": ..., "sentence": ..., "frames": T}
+                       000000000.npy   (T, 224, 224, 3) uint8 RGB
+                       ...
+    index.json         per-shard sample counts and sizes (written last)
+
+    python shards.py pack --csv /Volumes/Arun/how2sign_train.csv --video-dir /Volumes/Arun/train_raw \
+                          --out /Volumes/Arun/shards/train
+    python train.py --shards-train /Volumes/Arun/shards/train --shards-val /Volumes/Arun/shards/val
+
+ShardedClipDataset streams the shards: the shard order is shuffled per epoch, shards are
+split across ranks and DataLoader workers, and a shuffle buffer mixes samples within
+the shards each worker is reading. Captions are stored as text, like the other stores.
+"""
+import io
+import os
+import json
+import time
+import random
+import tarfile
+import argparse
+
+import numpy as np
+import torch
+from torch.utils.data import IterableDataset, DataLoader, get_worker_info
+
+from train import How2SignDataset, Vocabulary, FPS, MAX_FRAMES, SEED, read_video_frames, frames_to_tensor
+
+SAMPLES_PER_SHARD = 200        # ~1 GB per shard at 32 frames of 224x224x3 uint8
+SHUFFLE_BUFFER = 64            # Samples held per worker for within-shard shuffling
+READ_BUFFER = 16 * 2**20       # Bytes per read() from the shard file; keeps reads large and sequential
+
+# -----------------------------
+# Packing
+# -----------------------------
+class _PackSource(How2SignDataset):
+    """How2SignDataset rows decoded to uint8 frames, so DataLoader workers can decode in parallel."""
+    def __getitem__(self, idx):
+        row = self.samples[idx]
+        video_file = os.path.join(self.video_dir, f"{row['VIDEO_NAME']}.mp4")
+        frames = read_video_frames(video_file, int(float(row['START']) * FPS), int(float(row['END']) * FPS),
+                                   self.max_frames)
+        return frames, {"name": str(row['SENTENCE_NAME']), "sentence": str(row['SENTENCE'])}
+
+def _add_member(tar, name, payload):
+    info = tarfile.TarInfo(name)
+    info.size = len(payload)
+    info.mtime = int(time.time())
+    tar.addfile(info, io.BytesIO(payload))
+
+def pack(csv_path, video_dir, out_dir, samples_per_shard=SAMPLES_PER_SHARD, num_workers=4, max_frames=MAX_FRAMES):
+    os.makedirs(out_dir, exist_ok=True)
+    source = _PackSource(csv_path, video_dir, Vocabulary(), max_frames=max_frames)
+    # Clips are written in CSV order; shuffling happens at read time.
+    loader = DataLoader(source, batch_size=None, shuffle=False, num_workers=num_workers)
+    shards, tar, path, count = [], None, None, 0
+    start = time.perf_counter()
+
+    def finish_shard():
+        tar.close()
+        os.replace(path + ".tmp", path)
+        shards.append({"file": os.path.basename(path), "samples": count, "bytes": os.path.getsize(path)})
+
+    for i, (frames, meta) in enumerate(loader):
+        if tar is None:
+            path = os.path.join(out_dir, f"shard-{len(shards):06d}.tar")
+            tar = tarfile.open(path + ".tmp", "w")
+            count = 0
+        frames = np.asarray(frames, dtype=np.uint8)
+        buffer = io.BytesIO()
+        np.save(buffer, frames)
+        # Metadata first, so a reader knows the caption before the frames arrive.
+        _add_member(tar, f"{i:09d}.json", json.dumps({**meta, "frames": int(frames.shape[0])}).encode())
+        _add_member(tar, f"{i:09d}.npy", buffer.getvalue())
+        count += 1
+        if count == samples_per_shard:
+            finish_shard()
+            tar = None
+            print(f"  {i + 1}/{len(source)} clips, {len(shards)} shards "
+                  f"({(i + 1) / (time.perf_counter() - start):.1f} clips/s)")
+    if tar is not None:
+        finish_shard()
+
+    index = {"format": "gestureai-shards-v1", "max_frames": max_frames, "shards": shards,
+             "samples": sum(s["samples"] for s in shards), "source_csv": csv_path}
+    tmp = os.path.join(out_dir, "index.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=1)
+    # The index is written last, so a directory without index.json is an incomplete pack.
+    os.replace(tmp, os.path.join(out_dir, "index.json"))
+    print(f"{index['samples']} clips in {len(shards)} shards written to {out_dir}")
+
+# -----------------------------
+# Streaming dataset
+# -----------------------------
+def iter_shard(path):
+    """Yield (uint8 frames, metadata) from one shard with a single sequential pass over the file."""
+    with open(path, "rb", buffering=READ_BUFFER) as f, tarfile.open(fileobj=f, mode="r|") as tar:
+        meta = None
+        for member in tar:
+            payload = tar.extractfile(member).read()
+            if member.name.endswith(".json"):
+                meta = json.loads(payload)
+            elif member.name.endswith(".npy"):
+                yield np.load(io.BytesIO(payload)), meta
+                meta = None
+
+class ShardedClipDataset(IterableDataset):
+    """
+    Streams (frames, caption) pairs from a packed shard directory.
+
+    Every epoch the shard list is shuffled (seeded by SEED + epoch, identical on every rank)
+    and dealt round-robin to the `world_size * num_workers` readers, so each DataLoader
+    worker reads whole shards sequentially. With `balance=True` every reader stops after the
+    same number of samples, keeping DDP ranks in lockstep at the cost of dropping up to one
+    shard's surplus per reader.
+    """
+    def __init__(self, directory, vocab, shuffle=True, buffer_size=SHUFFLE_BUFFER, rank=0, world_size=1,
+                 balance=None, seed=SEED):
+        with open(os.path.join(directory, "index.json")) as f:
+            self.index = json.load(f)
+        self.directory = directory
+        self.vocab = vocab
+        self.shuffle = shuffle
+        self.buffer_size = buffer_size if shuffle else 0
+        self.rank = rank
+        self.world_size = world_size
+        self.balance = world_size > 1 if balance is None else balance
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _assignment(self, num_workers):
+        """Shards for every reader this epoch; reader r = rank * num_workers + worker id."""
+        shards = list(self.index["shards"])
+        if self.shuffle:
+            random.Random(self.seed + self.epoch).shuffle(shards)
+        readers = self.world_size * num_workers
+        if self.balance and len(shards) < readers:
+            # Balanced readers all stop at the smallest share, which would then be empty.
+            raise ValueError(f"{len(shards)} shards cannot feed {readers} readers "
+                             f"({self.world_size} ranks x {num_workers} workers); pack smaller shards")
+        return [shards[r::readers] for r in range(readers)]
+
+    def _caption(self, sentence):
+        tokens = [self.vocab.word2idx["<SOS>"]]
+        tokens += self.vocab.numericalize(sentence)
+        tokens.append(self.vocab.word2idx["<EOS>"])
+        return torch.tensor(tokens, dtype=torch.long)
+
+    def _samples(self, shards, limit):
+        produced = 0
+        for shard in shards:
+            for frames, meta in iter_shard(os.path.join(self.directory, shard["file"])):
+                if limit is not None and produced >= limit:
+                    return
+                produced += 1
+                yield frames, meta
+
+    def __iter__(self):
+        worker = get_worker_info()
+        num_workers, worker_id = (worker.num_workers, worker.id) if worker is not None else (1, 0)
+        assignment = self._assignment(num_workers)
+        reader = self.rank * num_workers + worker_id
+        limit = min(sum(s["samples"] for s in shards) for shards in assignment) if self.balance else None
+        rng = random.Random(self.seed + self.epoch * 1000003 + reader)
+
+        buffer = []
+        for frames, meta in self._samples(assignment[reader], limit):
+            buffer.append((frames, meta))
+            if len(buffer) > self.buffer_size:
+                # Emit a random element; the newest sample takes its slot.
+                i = rng.randrange(len(buffer))
+                buffer[i], buffer[-1] = buffer[-1], buffer[i]
+                yield self._to_item(*buffer.pop())
+        rng.shuffle(buffer)
+        for frames, meta in buffer:
+            yield self._to_item(frames, meta)
+
+    def _to_item(self, frames, meta):
+        return frames_to_tensor(frames), self._caption(meta["sentence"])
+
+# -----------------------------
+# Read throughput
+# -----------------------------
+def read_bench(directory, max_shards):
+    with open(os.path.join(directory, "index.json")) as f:
+        shards = json.load(f)["shards"][:max_shards]
+    clips, size = 0, 0
+    start = time.perf_counter()
+    for shard in shards:
+        for frames, _ in iter_shard(os.path.join(directory, shard["file"])):
+            clips += 1
+            size += frames.nbytes
+    elapsed = time.perf_counter() - start
+    print(f"{clips} clips from {len(shards)} shards in {elapsed:.1f}s: "
+          f"{clips / elapsed:.1f} clips/s, {size / elapsed / 2**20:.1f} MB/s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential tar shards of preprocessed clips")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_pack = sub.add_parser("pack", help="Decode every clip of a How2Sign CSV once and write tar shards")
+    p_pack.add_argument("--csv", required=True)
+    p_pack.add_argument("--video-dir", required=True)
+    p_pack.add_argument("--out", required=True, help="Output shard directory")
+    p_pack.add_argument("--samples-per-shard", type=int, default=SAMPLES_PER_SHARD)
+    p_pack.add_argument("--num-workers", type=int, default=4, help="Parallel video decoders")
+    p_pack.add_argument("--max-frames", type=int, default=MAX_FRAMES)
+    p_read = sub.add_parser("read-bench", help="Measure sequential read throughput of a shard directory")
+    p_read.add_argument("directory")
+    p_read.add_argument("--max-shards", type=int, default=4)
+    args = parser.parse_args()
+    if args.command == "pack":
+        pack(args.csv, args.video_dir, args.out, args.samples_per_shard, args.num_workers, args.max_frames)
+    else:
+        read_bench(args.directory, args.max_shards)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import io
+
+# -----------------------------
+# Subword vocabulary (SentencePiece BPE / unigram)
+# -----------------------------
+class SubwordVocabulary:
+    """
+    Drop-in alternative to `Vocabulary` backed by a SentencePiece model trained on the
+    captions. Special tokens keep the ids the rest of the code expects
+    (<PAD>=0, <SOS>=1, <EOS>=2, <UNK>=3), and pieces are exposed through the same
+    word2idx / idx2word / numericalize interface.
+    """
+    def __init__(self, model_proto=None):
+        self.model_proto = model_proto
+        self.sp = None
+        self.word2idx = {}
+        self.idx2word = {}
+        if model_proto is not None:
+            self._load(model_proto)
+
+    def _load(self, model_proto):
+        import sentencepiece as spm
+        self.model_proto = model_proto
+        self.sp = spm.SentencePieceProcessor(model_proto=model_proto)
+        self.idx2word = {i: self.sp.id_to_piece(i) for i in range(self.sp.get_piece_size())}
+        self.word2idx = {piece: i for i, piece in self.idx2word.items()}
+
+    def build_vocabulary(self, sentence_list, vocab_size=4000, model_type="bpe"):
+        import sentencepiece as spm
+        model = io.BytesIO()
+        spm.SentencePieceTrainer.train(
+            sentence_iterator=iter(s.lower() for s in sentence_list),
+            model_writer=model,
+            vocab_size=vocab_size,
+            model_type=model_type,
+            pad_id=0, bos_id=1, eos_id=2, unk_id=3,
+            pad_piece="<PAD>", bos_piece="<SOS>", eos_piece="<EOS>", unk_piece="<UNK>",
+            character_coverage=1.0,
+            hard_vocab_limit=False,  # small caption sets may not support the requested size
+        )
+        self._load(model.getvalue())
+
+    def numericalize(self, text):
+        return self.sp.encode(text.lower())
+
+    def decode(self, token_ids):
+        return self.sp.decode([int(i) for i in token_ids])
+
+    def state_dict(self):
+        return {"type": "subword", "model_proto": self.model_proto}
+
+    @classmethod
+    def from_state_dict(cls, state):
+        return cls(model_proto=state["model_proto"])
@@ -1,11 +1,23 @@
 import os
+import sys
+import glob
+import json
+import time
+import queue
+import random
+import threading
+import argparse
+import contextlib
 import cv2
 import numpy as np
 import pandas as pd
 import torch
 import torch.nn as nn
 import torch.optim as optim
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel as DDP
 from torch.utils.data import Dataset, DataLoader
+from torch.utils.data.distributed import DistributedSampler
 
 # -----------------------------
 # Configuration
@@ -28,12 +40,25 @@ MAX_FRAMES = 32   # Maximum number of frames to sample per video segment
 FPS = 24          # Use 24 FPS since you determined that's your video frame rate
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
+LOG_INTERVAL = 50                 # Log step timing/throughput every N training steps
+METRICS_LOG = os.path.join(SAVED_MODEL_DIR, "metrics.jsonl")  # One JSON record per epoch
+PROFILE_DIR = os.path.join(SAVED_MODEL_DIR, "profiles")        # Chrome traces from --profile
+CHECKPOINT_DIR = os.path.join(SAVED_MODEL_DIR, "checkpoints")  # Resumable training checkpoints
+STUDENT_DIR = os.path.join(SAVED_MODEL_DIR, "student")          # Output of --distill-from runs
+FEATURES_DIR = os.path.join(SAVED_MODEL_DIR, "features")        # Output of --features-train runs
+LANDMARKS_DIR = os.path.join(SAVED_MODEL_DIR, "landmarks")      # Output of --landmarks-train runs
+CHECKPOINT_EVERY = 500            # Write a resumable checkpoint every N training steps
+KEEP_CHECKPOINTS = 3              # Number of most recent step checkpoints to retain
+SEED = 42                         # Base seed for the per-epoch data shuffle
+
 # -----------------------------
 # Vocabulary and Tokenization
 # -----------------------------
 class Vocabulary:
-    def __init__(self, freq_threshold=1):
+    def __init__(self, freq_threshold=1, sort_by_freq=False):
         self.freq_threshold = freq_threshold
+        # Frequency-ordered ids (most frequent first) are required by the adaptive softmax head.
+        self.sort_by_freq = sort_by_freq
         self.word2idx = {"<PAD>": 0, "<SOS>": 1, "<EOS>": 2, "<UNK>": 3}
         self.idx2word = {0: "<PAD>", 1: "<SOS>", 2: "<EOS>", 3: "<UNK>"}
         self.word_freq = {}
@@ -43,7 +68,10 @@ class Vocabulary:
         for sentence in sentence_list:
             for word in sentence.lower().split():
                 self.word_freq[word] = self.word_freq.get(word, 0) + 1
-        for word, freq in self.word_freq.items():
+        words = self.word_freq.items()
+        if self.sort_by_freq:
+            words = sorted(words, key=lambda item: -item[1])
+        for word, freq in words:
             if freq >= self.freq_threshold:
                 self.word2idx[word] = idx
                 self.idx2word[idx] = word
@@ -53,6 +81,39 @@ class Vocabulary:
         tokens = [self.word2idx.get(word, self.word2idx["<UNK>"]) for word in text.lower().split()]
         return tokens
 
+    def decode(self, token_ids):
+        return " ".join(self.idx2word.get(i, "<UNK>") for i in token_ids)
+
+    def state_dict(self):
+        return {"type": "word", "freq_threshold": self.freq_threshold, "word2idx": dict(self.word2idx),
+                "word_freq": dict(self.word_freq)}
+
+    @classmethod
+    def from_state_dict(cls, state):
+        vocab = cls(freq_threshold=state["freq_threshold"])
+        vocab.word2idx = dict(state["word2idx"])
+        vocab.idx2word = {idx: word for word, idx in vocab.word2idx.items()}
+        vocab.word_freq = dict(state["word_freq"])
+        return vocab
+
+# Decoder tensors indexed by token id (embedding rows, output head rows / adaptive clusters).
+TOKEN_INDEXED_PREFIXES = ("decoder.embed.", "decoder.fc.", "decoder.adaptive.", "decoder.adaptive_cutoffs")
+
+def same_token_ids(a, b):
+    """True when two vocabularies map tokens to the same ids (frequencies and thresholds aside)."""
+    if a is None or b is None:
+        return False
+    ignored = ("word_freq", "freq_threshold")
+    return ({k: v for k, v in a.state_dict().items() if k not in ignored}
+            == {k: v for k, v in b.state_dict().items() if k not in ignored})
+
+def vocabulary_from_state(state):
+    """Rebuild a word or subword vocabulary saved with `state_dict()`."""
+    if state.get("type") == "subword":
+        from tokenizer import SubwordVocabulary
+        return SubwordVocabulary.from_state_dict(state)
+    return Vocabulary.from_state_dict(state)
+
 # -----------------------------
 # Dataset Definition
 # -----------------------------
@@ -97,33 +158,50 @@ class How2SignDataset(Dataset):
         return frames, caption_tensor
     
     def _load_video_segment(self, video_file, start_frame, end_frame, max_frames):
-        cap = cv2.VideoCapture(video_file)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        # Clamp frame indices to valid range
-        if start_frame >= total_frames:
-            start_frame = 0
-        if end_frame > total_frames:
-            end_frame = total_frames
-        
-        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
-        frames_list = []
-        current_frame = start_frame
-        while current_frame < end_frame:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            frame = cv2.resize(frame, (224, 224))
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frames_list.append(frame)
-            current_frame += 1
-            if len(frames_list) >= max_frames:
-                break
-        cap.release()
-        if len(frames_list) == 0:
-            frames_list.append(np.zeros((224, 224, 3), dtype=np.uint8))
-        frames_arr = np.array(frames_list) / 255.0
-        frames_tensor = torch.tensor(frames_arr).permute(0, 3, 1, 2).float()
-        return frames_tensor
+        return load_video_segment(video_file, start_frame, end_frame, max_frames)
+
+def load_video_segment(video_file, start_frame, end_frame, max_frames):
+    """Decode up to max_frames frames of [start_frame, end_frame) as a (T, 3, 224, 224) float tensor."""
+    return frames_to_tensor(read_video_frames(video_file, start_frame, end_frame, max_frames))
+
+def read_video_frames(video_file, start_frame, end_frame, max_frames, pad_empty=True):
+    """
+    Decode up to max_frames frames of [start_frame, end_frame) as a (T, 224, 224, 3) uint8 RGB array.
+    An undecodable clip yields one black frame, or an empty (0, 224, 224, 3) array with pad_empty=False.
+    """
+    cap = cv2.VideoCapture(video_file)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    # Clamp frame indices to valid range
+    if start_frame >= total_frames:
+        start_frame = 0
+    if end_frame > total_frames:
+        end_frame = total_frames
+    
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    frames_list = []
+    current_frame = start_frame
+    while current_frame < end_frame:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame = cv2.resize(frame, (224, 224))
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frames_list.append(frame)
+        current_frame += 1
+        if len(frames_list) >= max_frames:
+            break
+    cap.release()
+    if len(frames_list) == 0:
+        if not pad_empty:
+            return np.zeros((0, 224, 224, 3), dtype=np.uint8)
+        frames_list.append(np.zeros((224, 224, 3), dtype=np.uint8))
+    return np.array(frames_list)
+
+def frames_to_tensor(frames):
+    """(T, 224, 224, 3) uint8 RGB frames -> (T, 3, 224, 224) float tensor in [0, 1]."""
+    frames_arr = np.asarray(frames) / 255.0
+    frames_tensor = torch.tensor(frames_arr).permute(0, 3, 1, 2).float()
+    return frames_tensor
 
 def collate_fn(batch):
     batch = [b for b in batch if b is not None]
@@ -135,10 +213,11 @@ def collate_fn(batch):
     for v in videos:
         t = v.shape[0]
         if t < max_t:
-            pad = torch.zeros((max_t - t, 3, 224, 224), dtype=torch.float32)
+            # Pad along time; works for frames (T, 3, 224, 224) and feature sequences (T, F).
+            pad = torch.zeros((max_t - t,) + tuple(v.shape[1:]), dtype=torch.float32)
             v = torch.cat([v, pad], dim=0)
         padded_videos.append(v.unsqueeze(0))
-    videos_tensor = torch.cat(padded_videos, dim=0)  # (batch, T, 3, 224, 224)
+    videos_tensor = torch.cat(padded_videos, dim=0)  # (batch, T, 3, 224, 224) or (batch, T, F)
     
     lengths = [len(c) for c in captions]
     max_len = max(lengths)
@@ -147,6 +226,31 @@ def collate_fn(batch):
         padded_captions[i, :len(c)] = c
     return videos_tensor, padded_captions
 
+class ResumableSampler(DistributedSampler):
+    """
+    Deterministic per-epoch shuffle (seeded by SEED + epoch) that can start part-way
+    through an epoch, so a resumed run sees exactly the samples it had not yet consumed.
+    Works single-process too (num_replicas=1, rank=0) without torch.distributed.
+    """
+    def __init__(self, dataset, num_replicas=1, rank=0, shuffle=True, seed=SEED):
+        super().__init__(dataset, num_replicas=num_replicas, rank=rank, shuffle=shuffle, seed=seed)
+        self.start_index = 0
+
+    def set_start_index(self, index):
+        # Applies to the next iteration only; set_epoch() resets it for later epochs.
+        self.start_index = index
+
+    def set_epoch(self, epoch):
+        super().set_epoch(epoch)
+        self.start_index = 0
+
+    def __iter__(self):
+        indices = list(super().__iter__())
+        return iter(indices[self.start_index:])
+
+    def __len__(self):
+        return self.num_samples - self.start_index
+
 # -----------------------------
 # Model Definition
 # -----------------------------
@@ -186,28 +290,67 @@ class VideoEncoder(nn.Module):
         return h[-1]
 
 class Decoder(nn.Module):
-    def __init__(self, vocab_size, embed_size, hidden_size):
+    """
+    LSTM caption decoder. With `adaptive_cutoffs` the full `hidden_size x vocab_size`
+    projection is replaced by an adaptive softmax: frequent tokens (ids below the first
+    cutoff) get a full-width head, rarer clusters get progressively narrower projections.
+    """
+    def __init__(self, vocab_size, embed_size, hidden_size, adaptive_cutoffs=None):
         super().__init__()
         self.embed = nn.Embedding(vocab_size, embed_size)
         self.lstm = nn.LSTM(embed_size, hidden_size, batch_first=True)
-        self.fc = nn.Linear(hidden_size, vocab_size)
-    
-    def forward(self, video_features, captions):
+        if adaptive_cutoffs:
+            self.adaptive = nn.AdaptiveLogSoftmaxWithLoss(hidden_size, vocab_size, list(adaptive_cutoffs), div_value=4.0)
+            # Stored in the state dict so checkpoints describe their own output head.
+            self.register_buffer("adaptive_cutoffs", torch.tensor(list(adaptive_cutoffs)))
+        else:
+            self.fc = nn.Linear(hidden_size, vocab_size)
+            self.adaptive = None
+
+    def hidden(self, video_features, captions):
         embeddings = self.embed(captions)  # (batch, seq_len, embed_size)
         h0 = video_features.unsqueeze(0)    # (1, batch, hidden_size)
         c0 = torch.zeros_like(h0)
         outputs, _ = self.lstm(embeddings, (h0, c0))
-        outputs = self.fc(outputs)
         return outputs
 
+    def project(self, outputs):
+        """Per-token scores: logits for the full head, log-probabilities for the adaptive head."""
+        if self.adaptive is None:
+            return self.fc(outputs)
+        return self.adaptive.log_prob(outputs.reshape(-1, outputs.size(-1))).view(*outputs.shape[:-1], -1)
+
+    def loss(self, outputs, targets, ignore_index=0):
+        """Mean token cross-entropy; the adaptive head never materialises full-vocabulary scores."""
+        if self.adaptive is None:
+            logits = self.fc(outputs)
+            return nn.functional.cross_entropy(logits.reshape(-1, logits.size(-1)), targets.reshape(-1),
+                                               ignore_index=ignore_index)
+        mask = targets.reshape(-1) != ignore_index
+        return self.adaptive(outputs.reshape(-1, outputs.size(-1))[mask], targets.reshape(-1)[mask]).loss
+
+    def predict(self, outputs):
+        """Greedy next-token ids for (batch, hidden_size) decoder outputs."""
+        if self.adaptive is None:
+            return self.fc(outputs).argmax(dim=1)
+        return self.adaptive.predict(outputs)
+
+    def forward(self, video_features, captions):
+        return self.project(self.hidden(video_features, captions))
+
 class ASLTranslator(nn.Module):
-    def __init__(self, vocab_size, embed_size, hidden_size):
+    def __init__(self, vocab_size, embed_size, hidden_size, encoder=None, adaptive_cutoffs=None):
         super().__init__()
-        self.encoder = VideoEncoder(encoded_size=256, hidden_size=hidden_size)
-        self.decoder = Decoder(vocab_size, embed_size, hidden_size)
+        # Any module mapping (batch, T, ...) inputs to (batch, hidden_size) can replace the pixel encoder.
+        self.encoder = encoder if encoder is not None else VideoEncoder(encoded_size=256, hidden_size=hidden_size)
+        self.decoder = Decoder(vocab_size, embed_size, hidden_size, adaptive_cutoffs)
     
-    def forward(self, videos, captions):
+    def forward(self, videos, captions, targets=None):
+        # With targets the loss is returned directly, which lets the adaptive softmax skip
+        # full-vocabulary scores (and keeps DDP's gradient hooks inside forward).
         video_features = self.encoder(videos)
+        if targets is not None:
+            return self.decoder.loss(self.decoder.hidden(video_features, captions), targets)
         outputs = self.decoder(video_features, captions)
         return outputs
 
@@ -215,15 +358,14 @@ class ASLTranslator(nn.Module):
         self.eval()
         with torch.no_grad():
             video_features = self.encoder(video)  # (1, hidden_size)
-            input_token = torch.tensor([[vocab.word2idx["<SOS>"]]], device=DEVICE)  # shape (1,1)
+            input_token = torch.tensor([[vocab.word2idx["<SOS>"]]], device=video.device)  # shape (1,1)
             h = video_features.unsqueeze(0)  # (1, 1, hidden_size)
             c = torch.zeros_like(h)
             generated = []
             for _ in range(max_len):
                 emb = self.decoder.embed(input_token)  # (1,1,embed_size)
                 out, (h, c) = self.decoder.lstm(emb, (h, c))
-                logits = self.decoder.fc(out.squeeze(1))  # (1, vocab_size)
-                pred = logits.argmax(dim=1)  # (1,)
+                pred = self.decoder.predict(out.squeeze(1))  # (1,)
                 token_id = pred.item()
                 if token_id == vocab.word2idx["<EOS>"]:
                     break
@@ -232,69 +374,654 @@ class ASLTranslator(nn.Module):
                 input_token = pred.unsqueeze(0)
             return generated
 
+def state_head_config(state):
+    """(vocab_size, adaptive_cutoffs or None) of the decoder stored in a state dict."""
+    cutoffs = state.get("decoder.adaptive_cutoffs")
+    return state["decoder.embed.weight"].shape[0], cutoffs.tolist() if cutoffs is not None else None
+
+def translator_from_state(state, embed_size=None, hidden_size=None, encoder=None, assign=False):
+    """
+    Build an ASLTranslator matching a saved state dict (full or adaptive output head, teacher or
+    distilled student, sizes read from the weights) and load it.
+    `assign=True` uses the state's tensors as the parameters instead of copying them (e.g. mmap-loaded).
+    """
+    vocab_size, cutoffs = state_head_config(state)
+    embed_size = embed_size or state["decoder.embed.weight"].shape[1]
+    hidden_size = hidden_size or state["decoder.lstm.weight_hh_l0"].shape[1]
+    if encoder is None and "encoder.resolution" in state:
+        from distill import StudentVideoEncoder
+        encoder = StudentVideoEncoder.from_state(state, hidden_size)
+    model = ASLTranslator(vocab_size, embed_size, hidden_size, encoder=encoder, adaptive_cutoffs=cutoffs)
+    model.load_state_dict(state, assign=assign)
+    return model
+
+# -----------------------------
+# Instrumentation
+# -----------------------------
+# `checkpoint` covers the bookkeeping after the optimizer: checkpoint snapshots (including
+# waiting on a previous write) and the profiler step.
+STEP_PHASES = ("data_wait", "h2d", "forward", "backward", "optimizer", "checkpoint")
+
+def _sync():
+    # CUDA kernels run asynchronously; synchronize so phase timings are attributed correctly.
+    if DEVICE.type == "cuda":
+        torch.cuda.synchronize()
+
+def memory_stats():
+    """Peak memory in MB: CUDA allocator peak on GPU, process max RSS otherwise."""
+    if DEVICE.type == "cuda":
+        return {"cuda_max_allocated_mb": torch.cuda.max_memory_allocated() / 2**20,
+                "cuda_max_reserved_mb": torch.cuda.max_memory_reserved() / 2**20}
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS and kilobytes on Linux.
+        return {"max_rss_mb": rss / 2**20 if sys.platform == "darwin" else rss / 2**10}
+    except ImportError:
+        return {}
+
+class StepTimer:
+    """
+    Accumulates per-phase wall time (ms) for training steps over an epoch and over
+    the current logging interval.
+
+    Call `mark(phase)` at the end of each phase; the time since the previous mark is
+    charged to that phase. `data_wait` is measured from the end of the previous step
+    until the DataLoader hands over the next batch.
+    """
+    def __init__(self):
+        self.epoch = self._window()
+        self.interval = self._window()
+        self._last = time.perf_counter()
+
+    @staticmethod
+    def _window():
+        return {"totals": {phase: 0.0 for phase in STEP_PHASES}, "steps": 0, "samples": 0,
+                "started": time.perf_counter()}
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        elapsed_ms = (now - self._last) * 1000.0
+        self.epoch["totals"][phase] += elapsed_ms
+        self.interval["totals"][phase] += elapsed_ms
+        self._last = now
+
+    def skip(self):
+        """Drop the time since the last mark (e.g. interval logging) instead of charging it to the next phase."""
+        self._last = time.perf_counter()
+
+    def end_step(self, batch_size):
+        for window in (self.epoch, self.interval):
+            window["steps"] += 1
+            window["samples"] += batch_size
+
+    def reset_interval(self):
+        self.interval = self._window()
+
+    def summary(self, interval=False):
+        window = self.interval if interval else self.epoch
+        elapsed = time.perf_counter() - window["started"]
+        steps = max(window["steps"], 1)
+        stats = {f"{phase}_ms": total / steps for phase, total in window["totals"].items()}
+        step_ms = sum(window["totals"].values()) / steps
+        stats["step_ms"] = step_ms
+        # Share of step time spent waiting on the input pipeline: high means I/O-bound.
+        stats["data_wait_pct"] = 100.0 * stats["data_wait_ms"] / step_ms if step_ms else 0.0
+        stats["samples_per_s"] = window["samples"] / elapsed if elapsed else 0.0
+        stats["steps"] = window["steps"]
+        return stats
+
+def make_profiler(enabled, warmup_steps, active_steps, trace_dir):
+    """
+    torch.profiler capture of `active_steps` steps after `warmup_steps`, written as a
+    Chrome trace (open in chrome://tracing or Perfetto). Returns a no-op context when disabled.
+    """
+    if not enabled:
+        return contextlib.nullcontext()
+    from torch.profiler import profile, schedule, ProfilerActivity
+    os.makedirs(trace_dir, exist_ok=True)
+    activities = [ProfilerActivity.CPU]
+    if DEVICE.type == "cuda":
+        activities.append(ProfilerActivity.CUDA)
+
+    def on_trace_ready(prof):
+        path = os.path.join(trace_dir, f"trace_step{prof.step_num}_{int(time.time())}.json")
+        prof.export_chrome_trace(path)
+        print(f"  [profiler] Chrome trace written to {path}")
+
+    return profile(
+        activities=activities,
+        schedule=schedule(skip_first=warmup_steps, wait=0, warmup=1, active=active_steps, repeat=1),
+        on_trace_ready=on_trace_ready,
+        record_shapes=True,
+        profile_memory=True,
+    )
+
+# -----------------------------
+# Distributed Training
+# -----------------------------
+def setup_distributed(backend="gloo"):
+    """
+    Initialise torch.distributed from the environment set by `torchrun`.
+
+    Returns (rank, world_size, local_rank); (0, 1, 0) when not launched by torchrun.
+    Each process gets an equal share of the node's cores so ranks do not oversubscribe.
+    """
+    if "RANK" not in os.environ or "WORLD_SIZE" not in os.environ:
+        return 0, 1, 0
+    rank = int(os.environ["RANK"])
+    world_size = int(os.environ["WORLD_SIZE"])
+    local_rank = int(os.environ.get("LOCAL_RANK", 0))
+    local_world_size = int(os.environ.get("LOCAL_WORLD_SIZE", world_size))
+    if DEVICE.type == "cuda":
+        torch.cuda.set_device(local_rank)
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // local_world_size))
+    dist.init_process_group(backend=backend, rank=rank, world_size=world_size)
+    return rank, world_size, local_rank
+
+def is_main_process():
+    return not dist.is_initialized() or dist.get_rank() == 0
+
+def all_reduce_sum(*values):
+    """Sum Python numbers across ranks (identity when running single-process)."""
+    t = torch.tensor(values, dtype=torch.float64)
+    if dist.is_initialized():
+        dist.all_reduce(t, op=dist.ReduceOp.SUM)
+    return t.tolist()
+
+def unwrap(model):
+    return model.module if isinstance(model, DDP) else model
+
+# -----------------------------
+# Checkpointing
+# -----------------------------
+def snapshot(obj):
+    """Recursively copy tensors to CPU so training can keep mutating the originals."""
+    if torch.is_tensor(obj):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: snapshot(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot(v) for v in obj)
+    return obj
+
+def rng_state():
+    state = {"python": random.getstate(), "numpy": np.random.get_state(), "torch": torch.get_rng_state()}
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+def set_rng_state(state):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+class AsyncCheckpointer:
+    """
+    Writes checkpoints from a background thread.
+
+    `save` takes a CPU snapshot of the state on the caller's thread (fast, memory-only)
+    and queues it; the writer thread serialises it to a temporary file, fsyncs it and
+    atomically renames it into place, then prunes step checkpoints beyond `keep`.
+    At most one write is in flight: a second `save` waits until the previous write has
+    finished before taking its snapshot, which bounds memory to a single extra copy of
+    the state. Writer errors are re-raised on the next `save` or on `close`.
+    """
+    PREFIX = "ckpt_step"
+
+    def __init__(self, directory, keep=KEEP_CHECKPOINTS):
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+        self._queue = queue.Queue(maxsize=1)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            files, prune = item
+            try:
+                for path, state in files:
+                    tmp_path = path + ".tmp"
+                    with open(tmp_path, "wb") as f:
+                        torch.save(state, f)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, path)
+                if prune:
+                    self._prune()
+            except Exception as e:  # surfaced to the training thread on the next call
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _prune(self):
+        for path in self.list_checkpoints(self.directory)[:-self.keep]:
+            os.remove(path)
+
+    def _raise_pending_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Background checkpoint write failed") from error
+
+    def save(self, state, step=None, path=None, model_path=None):
+        """
+        Queue `state` for writing. Step checkpoints (`step=`) go to the checkpoint directory
+        and are subject to retention; `path=` writes a standalone file such as best_model.pth.
+        `model_path=` additionally writes the weights + vocabulary of a training state to a
+        model file from the same snapshot, in the same queued write.
+        """
+        # Wait for the previous write (not just its dequeue) before snapshotting, so only
+        # one CPU copy of the state exists at a time.
+        self._queue.join()
+        self._raise_pending_error()
+        prune = path is None
+        if path is None:
+            path = os.path.join(self.directory, f"{self.PREFIX}{step:09d}.pt")
+        state = snapshot(state)
+        files = [(path, state)]
+        if model_path is not None:
+            files.append((model_path, {"model": state["model"], "vocab": state["vocab"]}))
+        self._queue.put((files, prune))
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_pending_error()
+
+    @classmethod
+    def list_checkpoints(cls, directory):
+        return sorted(glob.glob(os.path.join(directory, f"{cls.PREFIX}*.pt")))
+
+    @classmethod
+    def latest(cls, directory):
+        checkpoints = cls.list_checkpoints(directory)
+        return checkpoints[-1] if checkpoints else None
+
+def adaptive_cutoffs_for(vocab_size, cutoffs):
+    """Keep only the cutoffs that split a vocabulary of this size; None if none remain."""
+    cutoffs = sorted(c for c in cutoffs if 0 < c < vocab_size - 1)
+    return cutoffs or None
+
+def model_artifact(model, vocab):
+    """Weights plus vocabulary: the model-file format read by evaluate.py and the backend registry."""
+    return {"model": unwrap(model).state_dict(), "vocab": vocab.state_dict()}
+
+def training_state(model, optimizer, vocab, epoch, batches_in_epoch, global_step, best_val_loss, world_size):
+    """Everything needed to continue a run exactly where it stopped."""
+    return {
+        "model": unwrap(model).state_dict(),
+        "optimizer": optimizer.state_dict(),
+        "epoch": epoch,                        # Epoch in progress (0-based)
+        "batches_in_epoch": batches_in_epoch,  # Batches of that epoch already consumed per rank
+        "global_step": global_step,
+        "best_val_loss": best_val_loss,
+        "vocab": vocab.state_dict(),
+        "rng": rng_state(),
+        "config": {"batch_size": BATCH_SIZE, "world_size": world_size, "seed": SEED,
+                   "embed_size": unwrap(model).decoder.embed.embedding_dim,
+                   "hidden_size": unwrap(model).decoder.lstm.hidden_size,
+                   "tokenizer": vocab.state_dict()["type"]},
+    }
+
+def load_checkpoint(path):
+    # weights_only=False: the checkpoint also holds RNG states and the vocabulary.
+    return torch.load(path, map_location="cpu", weights_only=False)
+
+def log_metrics(record, path=METRICS_LOG):
+    """Append one structured metrics record to the JSONL log and echo it."""
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    print(" | ".join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in record.items()))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the ASL-to-text translator")
+    parser.add_argument("--log-interval", type=int, default=LOG_INTERVAL,
+                        help="Log step timing and throughput every N steps (0 disables)")
+    parser.add_argument("--output-dir", default=None,
+                        help=f"Directory for best/final models (default: {SAVED_MODEL_DIR}; "
+                             f"{STUDENT_DIR} with --distill-from, {FEATURES_DIR} with --features-train, "
+                             f"{LANDMARKS_DIR} with --landmarks-train)")
+    parser.add_argument("--metrics-log", default=None,
+                        help="JSONL file receiving one metrics record per epoch (default: OUTPUT_DIR/metrics.jsonl)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Capture a torch.profiler Chrome trace after --profile-warmup steps")
+    parser.add_argument("--profile-warmup", type=int, default=10,
+                        help="Steps to skip before the profiler capture window")
+    parser.add_argument("--profile-steps", type=int, default=5,
+                        help="Number of steps captured by the profiler")
+    parser.add_argument("--profile-dir", default=PROFILE_DIR,
+                        help="Directory for profiler Chrome traces")
+    parser.add_argument("--dist-backend", default="gloo",
+                        help="torch.distributed backend when launched with torchrun")
+    parser.add_argument("--num-workers", type=int, default=0,
+                        help="DataLoader worker processes per rank")
+    parser.add_argument("--landmarks-train", default=None,
+                        help="Train on a landmark store (see landmarks.py extract) instead of raw frames")
+    parser.add_argument("--landmarks-val", default=None,
+                        help="Validation landmark store; required with --landmarks-train")
+    parser.add_argument("--features-train", default=None,
+                        help="Train the encoder LSTM and decoder on cached CNN features (see feature_cache.py)")
+    parser.add_argument("--features-val", default=None,
+                        help="Validation feature cache; required with --features-train")
+    parser.add_argument("--shards-train", default=None,
+                        help="Stream training clips from sequential tar shards (see shards.py pack)")
+    parser.add_argument("--shards-val", default=None,
+                        help="Validation shard directory; required with --shards-train")
+    parser.add_argument("--shuffle-buffer", type=int, default=64,
+                        help="Per-worker shuffle buffer (samples) when streaming shards")
+    parser.add_argument("--init-from", default=None,
+                        help="Initialise matching parameters from a trained checkpoint before training")
+    parser.add_argument("--tokenizer", choices=["word", "bpe", "unigram"], default="word",
+                        help="Caption vocabulary: whole words, or SentencePiece BPE / unigram subwords")
+    parser.add_argument("--subword-vocab-size", type=int, default=4000,
+                        help="Target vocabulary size for --tokenizer bpe/unigram")
+    parser.add_argument("--adaptive-softmax", action="store_true",
+                        help="Use an adaptive softmax output layer instead of a full hidden x vocab projection")
+    parser.add_argument("--adaptive-cutoffs", default="2000,10000",
+                        type=lambda s: [int(x) for x in s.split(",")],
+                        help="Token-id boundaries of the adaptive softmax clusters (frequency-ordered ids)")
+    parser.add_argument("--distill-from", default=None,
+                        help="Train a compact student (see distill.py) against this frozen teacher checkpoint")
+    parser.add_argument("--student-resolution", type=int, default=112,
+                        help="Frame size the student downsamples its input to")
+    parser.add_argument("--student-hidden", type=int, default=256, help="Student LSTM hidden size")
+    parser.add_argument("--student-embed", type=int, default=128, help="Student word embedding size")
+    parser.add_argument("--distill-alpha", type=float, default=0.5,
+                        help="Weight of the teacher (KL) term; the rest goes to caption cross-entropy")
+    parser.add_argument("--distill-temperature", type=float, default=2.0,
+                        help="Softmax temperature applied to teacher and student scores")
+    parser.add_argument("--resume", default=None,
+                        help="Checkpoint to resume from, or 'auto' for the latest in --checkpoint-dir")
+    parser.add_argument("--checkpoint-dir", default=None,
+                        help="Directory for resumable step checkpoints (default: OUTPUT_DIR/checkpoints)")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY,
+                        help="Write a resumable checkpoint every N steps (0 = only at epoch end)")
+    parser.add_argument("--keep-checkpoints", type=int, default=KEEP_CHECKPOINTS,
+                        help="Number of most recent step checkpoints to keep")
+    args = parser.parse_args(argv)
+    if args.landmarks_train and not args.landmarks_val:
+        parser.error("--landmarks-val is required with --landmarks-train")
+    if args.features_train and not args.features_val:
+        parser.error("--features-val is required with --features-train")
+    if args.shards_train and not args.shards_val:
+        parser.error("--shards-val is required with --shards-train")
+    if args.distill_from and (args.landmarks_train or args.features_train):
+        parser.error("--distill-from trains a pixel student; it cannot be combined with landmark or feature inputs")
+    # Students, cached-feature and landmark runs get their own directories by default: sharing
+    # the pixel model's would let checkpoint pruning and --resume auto pick up its steps, and
+    # overwrite its best_model.pth (which distillation, export and compare read).
+    if args.output_dir is None:
+        if args.distill_from:
+            args.output_dir = STUDENT_DIR
+        elif args.features_train:
+            args.output_dir = FEATURES_DIR
+        elif args.landmarks_train:
+            args.output_dir = LANDMARKS_DIR
+        else:
+            args.output_dir = SAVED_MODEL_DIR
+    if args.checkpoint_dir is None:
+        args.checkpoint_dir = os.path.join(args.output_dir, "checkpoints")
+    if args.metrics_log is None:
+        args.metrics_log = os.path.join(args.output_dir, "metrics.jsonl")
+    if args.distill_from and os.path.abspath(os.path.dirname(args.distill_from)) in (
+            os.path.abspath(args.checkpoint_dir), os.path.abspath(args.output_dir)):
+        parser.error("--distill-from points into the student's output directory; "
+                     "use a different --output-dir / --checkpoint-dir")
+    return args
+
 # -----------------------------
 # Training Routine
 # -----------------------------
-def main():
-    # Build vocabulary from training sentences
-    train_df = pd.read_csv(TRAIN_CSV, sep='\t', header=None, 
-                           names=['VIDEO_ID', 'VIDEO_NAME', 'SENTENCE_ID', 'SENTENCE_NAME', 'START', 'END', 'SENTENCE'])
-    sentences = train_df['SENTENCE'].astype(str).tolist()
-    vocab = Vocabulary(freq_threshold=1)
-    vocab.build_vocabulary(sentences)
+def main(argv=None):
+    args = parse_args(argv)
+    rank, world_size, _ = setup_distributed(args.dist_backend)
+    main_process = rank == 0
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.resume == "auto":
+        args.resume = AsyncCheckpointer.latest(args.checkpoint_dir)
+    checkpoint = load_checkpoint(args.resume) if args.resume else None
+    teacher = teacher_vocab = None
+    if args.distill_from:
+        from distill import load_teacher, build_student, distillation_loss
+        teacher, teacher_vocab = load_teacher(args.distill_from, DEVICE)
+    if checkpoint is not None:
+        # Reuse the saved vocabulary so token ids match the saved weights.
+        vocab = vocabulary_from_state(checkpoint["vocab"])
+    elif teacher_vocab is not None:
+        # The student predicts over the teacher's vocabulary, token for token.
+        vocab = teacher_vocab
+    else:
+        # Build vocabulary from training sentences
+        train_df = pd.read_csv(TRAIN_CSV, sep='\t', header=None, 
+                               names=['VIDEO_ID', 'VIDEO_NAME', 'SENTENCE_ID', 'SENTENCE_NAME', 'START', 'END', 'SENTENCE'])
+        sentences = train_df['SENTENCE'].astype(str).tolist()
+        if args.tokenizer == "word":
+            vocab = Vocabulary(freq_threshold=1, sort_by_freq=args.adaptive_softmax)
+            vocab.build_vocabulary(sentences)
+        else:
+            from tokenizer import SubwordVocabulary
+            vocab = SubwordVocabulary()
+            vocab.build_vocabulary(sentences, vocab_size=args.subword_vocab_size, model_type=args.tokenizer)
     vocab_size = len(vocab.word2idx)
-    print("Vocabulary size:", vocab_size)
+    if teacher is not None and not same_token_ids(teacher_vocab, vocab):
+        raise SystemExit(f"The teacher's vocabulary ({args.distill_from}) does not match the resumed student's "
+                         f"({args.resume}); resume a student distilled from this teacher")
+    if checkpoint is not None:
+        cutoffs = state_head_config(checkpoint["model"])[1]
+    else:
+        cutoffs = adaptive_cutoffs_for(vocab_size, args.adaptive_cutoffs) if args.adaptive_softmax else None
+    if main_process:
+        print("Vocabulary size:", vocab_size, "| adaptive cutoffs:", cutoffs, "| world size:", world_size)
     
-    train_dataset = How2SignDataset(TRAIN_CSV, TRAIN_DIR, vocab, max_frames=MAX_FRAMES)
-    val_dataset = How2SignDataset(VAL_CSV, VAL_DIR, vocab, max_frames=MAX_FRAMES)
+    if args.landmarks_train:
+        from landmarks import LandmarkDataset, build_landmark_model
+        train_dataset = LandmarkDataset(args.landmarks_train, vocab, max_frames=MAX_FRAMES)
+        val_dataset = LandmarkDataset(args.landmarks_val, vocab, max_frames=MAX_FRAMES)
+    elif args.features_train:
+        from feature_cache import FeatureDataset, build_cached_feature_model
+        train_dataset = FeatureDataset(args.features_train, vocab, max_frames=MAX_FRAMES)
+        val_dataset = FeatureDataset(args.features_val, vocab, max_frames=MAX_FRAMES)
+    elif args.shards_train:
+        from shards import ShardedClipDataset
+        train_dataset = ShardedClipDataset(args.shards_train, vocab, buffer_size=args.shuffle_buffer,
+                                           rank=rank, world_size=world_size)
+        val_dataset = ShardedClipDataset(args.shards_val, vocab, shuffle=False, rank=rank, world_size=world_size,
+                                         balance=False)
+    else:
+        train_dataset = How2SignDataset(TRAIN_CSV, TRAIN_DIR, vocab, max_frames=MAX_FRAMES)
+        val_dataset = How2SignDataset(VAL_CSV, VAL_DIR, vocab, max_frames=MAX_FRAMES)
     
-    train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE, shuffle=True, collate_fn=collate_fn)
-    val_loader = DataLoader(val_dataset, batch_size=BATCH_SIZE, shuffle=False, collate_fn=collate_fn)
+    # Under torchrun each rank sees a disjoint shard of the data; BATCH_SIZE is per rank.
+    # The sampler's shuffle is seeded per epoch so a resumed run can skip consumed batches.
+    if args.shards_train:
+        # Streaming shards: the dataset splits shards across ranks/workers and shuffles itself.
+        train_sampler = val_sampler = None
+        train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE,
+                                  num_workers=args.num_workers, collate_fn=collate_fn)
+    else:
+        train_sampler = ResumableSampler(train_dataset, num_replicas=world_size, rank=rank, shuffle=True)
+        val_sampler = DistributedSampler(val_dataset, shuffle=False) if world_size > 1 else None
+        train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE,
+                                  sampler=train_sampler, num_workers=args.num_workers, collate_fn=collate_fn)
+    val_loader = DataLoader(val_dataset, batch_size=BATCH_SIZE, shuffle=False,
+                            sampler=val_sampler, num_workers=args.num_workers, collate_fn=collate_fn)
     
-    model = ASLTranslator(vocab_size, EMBED_SIZE, HIDDEN_SIZE).to(DEVICE)
-    criterion = nn.CrossEntropyLoss(ignore_index=vocab.word2idx["<PAD>"])
+    if args.landmarks_train:
+        model = build_landmark_model(vocab_size, EMBED_SIZE, HIDDEN_SIZE, adaptive_cutoffs=cutoffs).to(DEVICE)
+    elif args.features_train:
+        model = build_cached_feature_model(vocab_size, EMBED_SIZE, HIDDEN_SIZE, adaptive_cutoffs=cutoffs).to(DEVICE)
+    elif teacher is not None:
+        model = build_student(vocab_size, args.student_resolution, args.student_hidden, args.student_embed,
+                              adaptive_cutoffs=cutoffs).to(DEVICE)
+        if main_process:
+            print(f"Distilling from {args.distill_from}: student "
+                  f"{sum(p.numel() for p in model.parameters()):,} params, "
+                  f"teacher {sum(p.numel() for p in teacher.parameters()):,}")
+    else:
+        model = ASLTranslator(vocab_size, EMBED_SIZE, HIDDEN_SIZE, adaptive_cutoffs=cutoffs).to(DEVICE)
+    if checkpoint is not None:
+        model.load_state_dict(checkpoint["model"])
+    elif args.init_from:
+        from feature_cache import load_matching
+        from evaluate import load_for_eval
+        init_state, init_vocab = load_for_eval(args.init_from)
+        # Token-indexed tensors are only meaningful under the same token ids: with a different
+        # vocabulary the embedding and output head keep their fresh init, even if the sizes match.
+        skip = () if same_token_ids(init_vocab, vocab) else TOKEN_INDEXED_PREFIXES
+        loaded = load_matching(model, init_state, skip_prefixes=skip)
+        if main_process:
+            reason = "no vocabulary in checkpoint" if init_vocab is None else "vocabulary differs"
+            print(f"Initialised {len(loaded)} tensors from {args.init_from}"
+                  + (f" ({reason}: embedding and output head not copied)" if skip else ""))
+    if world_size > 1:
+        # Adaptive softmax tail clusters without a target in the batch get no gradient that step.
+        model = DDP(model, find_unused_parameters=cutoffs is not None)
     optimizer = optim.Adam(model.parameters(), lr=LEARNING_RATE)
     
     best_val_loss = float('inf')
-    for epoch in range(NUM_EPOCHS):
-        model.train()
-        total_loss = 0
-        for batch in train_loader:
-            if batch is None:
-                continue
-            videos, captions = batch
-            videos = videos.to(DEVICE)
-            captions = captions.to(DEVICE)
-            optimizer.zero_grad()
-            outputs = model(videos, captions[:, :-1])
-            loss = criterion(outputs.reshape(-1, vocab_size), captions[:, 1:].reshape(-1))
-            loss.backward()
-            optimizer.step()
-            total_loss += loss.item()
-        avg_train_loss = total_loss / len(train_loader)
-        
-        model.eval()
-        val_loss = 0
-        with torch.no_grad():
-            for batch in val_loader:
+    global_step = 0
+    start_epoch = 0
+    resume_batches = 0
+    if checkpoint is not None:
+        optimizer.load_state_dict(checkpoint["optimizer"])
+        set_rng_state(checkpoint["rng"])
+        start_epoch = checkpoint["epoch"]
+        global_step = checkpoint["global_step"]
+        best_val_loss = checkpoint["best_val_loss"]
+        resume_batches = checkpoint["batches_in_epoch"]
+        if checkpoint["config"]["world_size"] != world_size or checkpoint["config"]["batch_size"] != BATCH_SIZE:
+            # The per-rank shards differ, so the mid-epoch position cannot be mapped; restart the epoch.
+            resume_batches = 0
+        if train_sampler is None:
+            # Streamed shards have no random-access position to skip to; restart the epoch.
+            resume_batches = 0
+        if main_process:
+            print(f"Resumed from {args.resume}: epoch {start_epoch + 1}, step {global_step}, "
+                  f"{resume_batches} batches into the epoch")
+        del checkpoint
+
+    # Only rank 0 writes; it snapshots state in memory and a background thread does the disk I/O.
+    checkpointer = AsyncCheckpointer(args.checkpoint_dir, keep=args.keep_checkpoints) if main_process else None
+    profiler = make_profiler(args.profile and main_process, args.profile_warmup, args.profile_steps, args.profile_dir)
+    with profiler:
+        for epoch in range(start_epoch, NUM_EPOCHS):
+            epoch_start = time.perf_counter()
+            # Reshuffle the per-rank shards every epoch
+            (train_sampler if train_sampler is not None else train_dataset).set_epoch(epoch)
+            batches_done = 0
+            if epoch == start_epoch and resume_batches:
+                # Skip what was consumed before the checkpoint. Losses for this epoch then
+                # average only the batches trained after resuming.
+                train_sampler.set_start_index(resume_batches * BATCH_SIZE)
+                batches_done = resume_batches
+            model.train()
+            total_loss = 0
+            train_batches = 0
+            timer = StepTimer()
+            for batch in train_loader:
+                timer.mark("data_wait")
+                batches_done += 1
                 if batch is None:
                     continue
                 videos, captions = batch
-                videos = videos.to(DEVICE)
-                captions = captions.to(DEVICE)
-                outputs = model(videos, captions[:, :-1])
-                loss = criterion(outputs.reshape(-1, vocab_size), captions[:, 1:].reshape(-1))
-                val_loss += loss.item()
-        avg_val_loss = val_loss / len(val_loader)
-        print(f"Epoch [{epoch+1}/{NUM_EPOCHS}] Train Loss: {avg_train_loss:.4f} | Val Loss: {avg_val_loss:.4f}")
-        
-        if avg_val_loss < best_val_loss:
-            best_val_loss = avg_val_loss
-            torch.save(model.state_dict(), os.path.join(SAVED_MODEL_DIR, "best_model.pth"))
-            print("  [*] Best model saved.")
+                videos = videos.to(DEVICE, non_blocking=True)
+                captions = captions.to(DEVICE, non_blocking=True)
+                _sync()
+                timer.mark("h2d")
+                optimizer.zero_grad()
+                # The loss is computed inside forward (padding ignored), so the output head never
+                # has to materialise full-vocabulary logits when adaptive softmax is enabled.
+                if teacher is not None:
+                    loss = distillation_loss(model, teacher, videos, captions,
+                                             args.distill_alpha, args.distill_temperature)
+                else:
+                    loss = model(videos, captions[:, :-1], targets=captions[:, 1:])
+                _sync()
+                timer.mark("forward")
+                loss.backward()
+                _sync()
+                timer.mark("backward")
+                optimizer.step()
+                total_loss += loss.item()  # .item() synchronizes, so the optimizer time is complete
+                train_batches += 1
+                timer.mark("optimizer")
+                global_step += 1
+                if args.profile and main_process:
+                    profiler.step()
+                if checkpointer is not None and args.checkpoint_every and global_step % args.checkpoint_every == 0:
+                    checkpointer.save(training_state(model, optimizer, vocab, epoch, batches_done, global_step,
+                                                     best_val_loss, world_size), step=global_step)
+                # Charged here rather than to the next step's data_wait, so slow checkpoint
+                # writes do not look like an input-bound pipeline.
+                timer.mark("checkpoint")
+                timer.end_step(videos.size(0))
+                if main_process and args.log_interval and global_step % args.log_interval == 0:
+                    stats = timer.summary(interval=True)
+                    print(f"  step {global_step} | loss {loss.item():.4f} | "
+                          + " ".join(f"{p}={stats[p + '_ms']:.1f}ms" for p in STEP_PHASES)
+                          + f" | {stats['samples_per_s']:.1f} samples/s"
+                          + f" | data wait {stats['data_wait_pct']:.0f}%"
+                          + "".join(f" | {k} {v:.0f}" for k, v in memory_stats().items()))
+                    timer.reset_interval()
+                    timer.skip()
+            train_time = time.perf_counter() - epoch_start
+
+            model.eval()
+            val_loss = 0
+            val_batches = 0
+            val_start = time.perf_counter()
+            with torch.no_grad():
+                for batch in val_loader:
+                    if batch is None:
+                        continue
+                    videos, captions = batch
+                    videos = videos.to(DEVICE)
+                    captions = captions.to(DEVICE)
+                    loss = model(videos, captions[:, :-1], targets=captions[:, 1:])
+                    val_loss += loss.item()
+                    val_batches += 1
+            # Average over every batch on every rank, not just this rank's shard.
+            total_loss, train_batches, val_loss, val_batches, samples = all_reduce_sum(
+                total_loss, train_batches, val_loss, val_batches, timer.epoch["samples"])
+            avg_train_loss = total_loss / max(train_batches, 1)
+            avg_val_loss = val_loss / max(val_batches, 1)
+
+            record = {"epoch": epoch + 1, "epochs": NUM_EPOCHS, "step": global_step,
+                      "train_loss": avg_train_loss, "val_loss": avg_val_loss,
+                      "train_time_s": train_time, "val_time_s": time.perf_counter() - val_start}
+            record.update(timer.summary())
+            record.update(memory_stats())
+            record["world_size"] = world_size
+            record["global_samples_per_s"] = samples / train_time if train_time else 0.0
+
+            # Every rank sees the same reduced val loss, so they agree on "best" without extra sync.
+            if main_process:
+                log_metrics(record, args.metrics_log)
+            improved = avg_val_loss < best_val_loss
+            best_val_loss = min(best_val_loss, avg_val_loss)
+            if checkpointer is not None:
+                # Epoch-boundary checkpoint: resumes at the start of the next epoch. An improved
+                # model is written from the same snapshot, so training waits on one write, not two.
+                best_path = os.path.join(args.output_dir, "best_model.pth") if improved else None
+                checkpointer.save(training_state(model, optimizer, vocab, epoch + 1, 0, global_step,
+                                                 best_val_loss, world_size), step=global_step, model_path=best_path)
+                if improved:
+                    print("  [*] Best model saved.")
     
-    torch.save(model.state_dict(), os.path.join(SAVED_MODEL_DIR, "final_model.pth"))
-    print("Training complete. Final model saved.")
+    if main_process:
+        checkpointer.save(model_artifact(model, vocab), path=os.path.join(args.output_dir, "final_model.pth"))
+        checkpointer.close()  # Wait for pending writes before exiting
+        print("Training complete. Final model saved.")
+    if dist.is_initialized():
+        dist.destroy_process_group()
 
 if __name__ == "__main__":
     main()